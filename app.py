@@ -4,40 +4,10 @@ alt.renderers.enable('browser')
 import pandas as pd
 from collections import namedtuple
 import datetime
-from pyarrow import dataset as ds
-
-def getESTData(estDf, reservoirName, pct):
-
-    outputEST = estDf.to_table(filter = (
-            (ds.field('Reservoir') == reservoirName) & 
-            (ds.field('pct') == pct)
-    )).to_pandas()
-    
-
-    outputEST.loc[outputEST.variable == 'POOL-ELEV', 'alternative'] = "ID3-IMPERFECT"
-    outputEST.loc[outputEST.variable == 'FIRO-TARGET', 'alternative'] = "FIRO-TARGET"
-    outputEST.loc[outputEST.variable == f'{reservoirName}-OUT', 'alternative'] = f'{reservoirName}-OUT'
-    outputEST.loc[outputEST.variable == f'{reservoirName}-IN', 'alternative'] = f'{reservoirName}-IN'
-
-    return outputEST
-
-def getBaselineData(baselineDf, reservoirName):
-    outputPerfectZero = baselineDf.to_table(filter = (
-        (ds.field('reservoirName') == reservoirName) &
-        (ds.field('alternative') == "ID0")
-    )).to_pandas()
-    
-    outputPerfectOne = baselineDf.to_table(filter = (
-        (ds.field('reservoirName') == reservoirName) &
-        (ds.field('alternative') == "ID1")
-    )).to_pandas()
-
-    outputPerfectThree = baselineDf.to_table(filter = (
-        (ds.field('reservoirName') == reservoirName) &
-        (ds.field('alternative') == "ID3-PERFECT")
-    )).to_pandas()
-
-    return outputPerfectZero, outputPerfectOne, outputPerfectThree 
+from scenarioData import (
+    DURATION_CACHE, TABLE_CACHE, ScenarioSeries, cachedDurations, getDurations, getESTMatrix, getBaselineMatrix,
+    scenario_catalog
+)
 
 def create_zone_rules(minDate, maxDate, zones, elevRange):
     
@@ -102,90 +72,6 @@ def create_zone_rules(minDate, maxDate, zones, elevRange):
         
     return allZones
 
-@st.cache_data(ttl = 24*60*60)
-def calculateDurations(outputEST):
-    durTable = outputEST.loc[outputEST.variable == 'DURATION', :].copy()
-    # Original lookup dictionary
-    lookup = {
-        7: "07-Day",
-        50: "05-Day",
-        57: "07-Day, 05-Day",
-        300: "03-Day",
-        307: "07-Day, 03-Day",
-        350: "05-Day, 03-Day",
-        357: "07-Day, 05-Day, 03-Day",
-        2000: "02-Day",
-        2007: "07-Day, 02-Day",
-        2050: "05-Day, 02-Day",
-        2057: "07-Day, 05-Day, 02-Day",
-        2300: "03-Day, 02-Day",
-        2307: "07-Day, 03-Day, 02-Day",
-        2350: "05-Day, 03-Day, 02-Day",
-        2357: "07-Day, 05-Day, 03-Day, 02-Day",
-        10000: "01-Day",
-        10007: "07-Day, 01-Day",
-        10050: "05-Day, 01-Day",
-        10057: "07-Day, 05-Day, 01-Day",
-        10300: "03-Day, 01-Day",
-        10307: "07-Day, 03-Day, 01-Day",
-        10350: "05-Day, 03-Day, 01-Day",
-        10357: "07-Day, 05-Day, 03-Day, 01-Day",
-        12000: "02-Day, 01-Day",
-        12007: "07-Day, 02-Day, 01-Day",
-        12050: "05-Day, 02-Day, 01-Day",
-        12057: "07-Day, 05-Day, 02-Day, 01-Day",
-        12300: "03-Day, 02-Day, 01-Day",
-        12307: "07-Day, 03-Day, 02-Day, 01-Day",
-        12350: "05-Day, 03-Day, 02-Day, 01-Day",
-        12357: "07-Day, 05-Day, 03-Day, 02-Day, 01-Day",
-    }
-
-    # Map the 'value' column to the 'durations' column using the combined lookup dictionary
-    durTable['durations'] = durTable.loc[:,'value'].map(lambda x: lookup.get(x, '').split(', '))
-
-    # Drop rows with NaN values in the 'durations' column
-    durTable = durTable.loc[durTable.value>0, :]
-
-    # Explode the 'durations' column to repeat each row for each element in the list
-    durTable = durTable.explode('durations')
-
-    # Reset the index if needed
-    durTable = durTable.reset_index(drop=True)
-    durTable.loc[:,'value'] = pd.to_numeric(durTable.durations.str.split('-', expand=True)[0])
-
-    # Assuming durTable is your DataFrame and 'durations' is the column with the duration labels
-    output = pd.DataFrame()
-
-    for duration, sub_group in durTable.groupby('durations'):
-        # Create a date range with 6-hour frequency
-        idx = pd.date_range(sub_group.date.min(), sub_group.date.max(), freq="6h")
-
-        # Drop unnecessary columns and reindex with the new date range
-        sub_group = sub_group.drop(['durations', 'variable'], axis=1)
-        sub_group = sub_group.set_index('date').reindex(idx, fill_value=-99, tolerance='1h', method='nearest')
-        sub_group.index.name = 'date'
-        sub_group = sub_group.reset_index()
-
-        # Set value to 1 where it is not -99, otherwise set to 0
-        sub_group['value'] = sub_group['value'].apply(lambda x: 1 if x != -99 else 0)
-
-        # Create a group identifier for consecutive values
-        sub_group['val_grp'] = (sub_group['value'].astype(bool)).astype(int)
-        sub_group['val_grp'] = (sub_group['val_grp'].diff(1) != 0).astype('int').cumsum()
-        sub_group = sub_group[sub_group['value'] != 0]
-
-        # Create a DataFrame with the results
-        res = sub_group.groupby('val_grp').agg(
-            BeginDate=('date', 'first'),
-            EndDate=('date', 'last'),
-            Consecutive=('date', 'size')
-        ).reset_index(drop=True)
-        res['duration'] = duration
-
-        # Concatenate the results to the output DataFrame
-        output = pd.concat([output, res], ignore_index=True)
-    return output
-
 reservoirNamesLookup = {
     "ORO": "Oroville",
     "NBB": "New Bullards Bar"
@@ -201,27 +87,36 @@ elevRangeLookup = {
     "NBB": (1870, 1970)
 }
 
-scaleFactorLookup = {
-    '1986':[100,102,104,106,108,110,112,114,116,118,120,130,140,150],
-    '1997':[84,86,88,90,92,94,96,98,100,102,104,106,108,110,120,130]
-}
+# Every scenario file in data/ (flat outputs and the --partitioned tree in
+# data/scenarios), read from data/_catalog.feather and rebuilt when a file
+# changes. The sidebar only offers scenarios the catalog holds with their
+# baseline, and the files are resolved from it.
+@st.cache_resource(ttl=5*60)
+def loadCatalog(root):
+    return scenario_catalog(root)
+
+catalog = loadCatalog("data")
+
+def selectOption(label, options, default):
+    return st.selectbox(label, options, index=options.index(default) if default in options else 0)
 
 # Define the options for the dropdowns
-pattern_year_options = [1986, 1997]
 alternative_est_options = [3]
-pct_options = list(range(5, 100, 5))
-arcSpillwayConfiguation_options = ["With", "Without"]
-datasets_options = ['HDR_proposals','FVA_config', 'ORO_Release_v2']
 
 # Create the sidebar dropdowns
 with st.sidebar:
-    dataset = st.selectbox("Select Dataset", datasets_options, index=datasets_options.index('HDR_proposals'))
-    patternYear = st.selectbox("Select Pattern Year", pattern_year_options, index=pattern_year_options.index(1986))
+    if not catalog.scenarios():
+        st.error("No EST scenario with a baseline output was found in data/")
+        st.stop()
+    dataset = selectOption("Select Dataset", catalog.options('dataset'), 'HDR_proposals')
+    patternYear = selectOption("Select Pattern Year", catalog.options('year', dataset=dataset), 1986)
     alternativeEST = st.selectbox("Select Alternative EST", alternative_est_options, index=alternative_est_options.index(3))
-    scale_factor_options = scaleFactorLookup[str(patternYear)]
-    scaleFactor = st.selectbox("Select Scale Factor", scale_factor_options, index=scale_factor_options.index(120))
-    pct = st.selectbox("Select Percentage", pct_options, index=pct_options.index(75))
-    arc_spillway_config = st.selectbox("Select Arc Spillway Config Perfect", arcSpillwayConfiguation_options)
+    arc_spillway_config = selectOption("Select Arc Spillway Config Perfect",
+        catalog.options('config', dataset=dataset, year=patternYear), "With")
+    scaleFactor = selectOption("Select Scale Factor",
+        catalog.options('scale', dataset=dataset, year=patternYear, config=arc_spillway_config), 120)
+    pct = selectOption("Select Percentage",
+        catalog.entry(dataset, patternYear, arc_spillway_config, scaleFactor)['pcts'], 75)
 
     # Display the selected values
     st.write("Selected Dataset:", dataset)
@@ -231,6 +126,10 @@ with st.sidebar:
     st.write("Selected Percentage:", pct)
     st.write("Selected Arc Spillway Configuration:", arc_spillway_config)
 
+    # Scenario tables are shared by every session on this server
+    # (scenarioData.TABLE_CACHE); filled in once this rerun has loaded its data
+    tableCacheCaption = st.empty()
+
 # Determine the Arc Spillway Config values
 if arc_spillway_config == "With":
     arcSpillwayConfigPerfect = "A"
@@ -248,11 +147,8 @@ zoneLookup = {
     "NBB": nbbZones
 }
 
-estFeatherFile = f"data/{patternYear}_{scaleFactor}_{arc_spillway_config}_{dataset}_Alt3.feather"
-baselineFeatherFile = f'data/{patternYear}_{scaleFactor}_{arc_spillway_config}_baseline.feather'
-
-estDf = ds.dataset(estFeatherFile, format = 'feather')
-baselineDf = ds.dataset(baselineFeatherFile, format = 'feather')
+estDf = catalog.open(dataset, patternYear, arc_spillway_config, scaleFactor)
+baselineDf = catalog.open('baseline', patternYear, arc_spillway_config, scaleFactor)
 
 graphics = {}
 
@@ -272,37 +168,31 @@ for reservoirName in ["ORO","NBB"]:
     flowRange = flowRangeLookup[reservoirName]
 
 
-    outputEST = getESTData(estDf, reservoirName, pct)
-
-
-    outputPerfectZero, outputPerfectOne, outputPerfectThree = getBaselineData(baselineDf, reservoirName)
+    # Series stay (series x hour) arrays on one time axis until a chart
+    # takes them as a long DataFrame
+    estSeries = getESTMatrix(estDf, reservoirName, pct)
+    estStart = pd.Timestamp(estSeries.times[0]).strftime('%Y-%m-%d %H:%M')
+    estEnd = pd.Timestamp(estSeries.times[-1]).strftime('%Y-%m-%d %H:%M')
 
-    # Create a list of dataframes containing the desired variables
-    dataframes = [
-        outputEST.loc[outputEST["variable"] == "POOL-ELEV", :],
-        outputEST.loc[outputEST["variable"] == "FIRO-TARGET", :],
-        outputPerfectZero.loc[outputPerfectZero["variable"] == "POOL-ELEV", :],
-        outputPerfectOne.loc[outputPerfectOne["variable"] == "POOL-ELEV", :],
-        outputPerfectThree.loc[outputPerfectThree["variable"] == "POOL-ELEV", :],
-    ]
+    # ID0, ID1 and ID3-PERFECT
+    perfectSeries = getBaselineMatrix(baselineDf, reservoirName)
 
-    # Concatenate the dataframes into a single dataframe
-    elevDf = pd.concat(dataframes)
-
-    dataframes = [
-        outputEST.loc[outputEST["variable"] == f'{reservoirName}-OUT', :],
-        outputEST.loc[outputEST["variable"] == f'{reservoirName}-IN', :],
-        outputPerfectZero.loc[outputPerfectZero["variable"] == f'{reservoirName}-OUT', :],
-        outputPerfectOne.loc[outputPerfectOne["variable"] == f'{reservoirName}-OUT', :],
-        outputPerfectThree.loc[outputPerfectThree["variable"] == f'{reservoirName}-OUT', :],
-    ]
+    # One long dataframe of the EST pool elevation and target and the baseline pool elevations
+    elevDf = ScenarioSeries.stack(
+        estSeries.select(variable=["POOL-ELEV", "FIRO-TARGET"]),
+        perfectSeries.select(variable="POOL-ELEV"),
+    ).to_frame()
 
     defaultwidth = 400
 
-    flowDf = pd.concat(dataframes)
     # Update flow df to match variable column from elev df
-    flowDf.loc[flowDf.alternative == f'{reservoirName}-OUT', 'alternative'] = 'ID3-IMPERFECT'
-    flowDf.loc[flowDf.alternative == f'{reservoirName}-IN', 'alternative'] = 'INFLOW'
+    flowDf = ScenarioSeries.stack(
+        estSeries.select(variable=[f'{reservoirName}-OUT', f'{reservoirName}-IN']),
+        perfectSeries.select(variable=f'{reservoirName}-OUT'),
+    ).relabel({
+        f'{reservoirName}-OUT': 'ID3-IMPERFECT',
+        f'{reservoirName}-IN': 'INFLOW',
+    }).to_frame()
 
     flowPlot = alt.Chart(flowDf).mark_line().encode(
         x=alt.X('date:T', title=None).axis(format='%Y-%m-%d'
@@ -333,7 +223,7 @@ for reservoirName in ["ORO","NBB"]:
 
     flowPlot = (flowPlot + rules)
 
-    flowMaryDf = outputEST.loc[outputEST["variable"] == "MARYSVILLE", :]
+    flowMaryDf = estSeries.select(variable="MARYSVILLE").to_frame()
     maryThreshold = 180000
     flowMary = alt.Chart(flowMaryDf).mark_line().encode(
             x=alt.X('date:T', title=None).axis(format='%Y-%m-%d'
@@ -362,7 +252,7 @@ for reservoirName in ["ORO","NBB"]:
 
     maryFlow = (flowMary + highlightMary + rulesMary).properties( title = "Marysville")#width=defaultwidth,  height=100,
 
-    flowYubaCityDf = outputEST.loc[outputEST["variable"] == "YUBA CITY", :]
+    flowYubaCityDf = estSeries.select(variable="YUBA CITY").to_frame()
     yubaThreshold = 180000
     flowYubaCity = alt.Chart(flowYubaCityDf).mark_line().encode(
             x=alt.X('date:T', title=None).axis(format='%Y-%m-%d'
@@ -392,7 +282,7 @@ for reservoirName in ["ORO","NBB"]:
 
     yubaFlow = (flowYubaCity + highlightYubaCity+ rulesYuba).properties(  title = "Yuba City")#width=defaultwidth, height=100,
 
-    flowNicolausDf = outputEST.loc[outputEST["variable"] == "NICOLAUS", :]
+    flowNicolausDf = estSeries.select(variable="NICOLAUS").to_frame()
     nicolausThreshold = 320000
     flowNicolaus = alt.Chart(flowNicolausDf).mark_line().encode(
             x=alt.X('date:T', title=None).axis(format='%Y-%m-%d'
@@ -421,7 +311,7 @@ for reservoirName in ["ORO","NBB"]:
 
     nicolausFlow = (flowNicolaus + highlightNicolaus + rulesNicolaus).properties(  title = "Nicolaus")#width=defaultwidth, height=100,
 
-    flowConfluenceDf = outputEST.loc[outputEST["variable"] == "CONFLUENCE", :]
+    flowConfluenceDf = estSeries.select(variable="CONFLUENCE").to_frame()
     confluenceThreshold = 300000
 
     flowConfluence = alt.Chart(flowConfluenceDf).mark_line().encode(
@@ -459,8 +349,8 @@ for reservoirName in ["ORO","NBB"]:
         axis=alt.Axis(format='%Y-%m-%d', labels=True)
         ).scale(
         domain=[
-            outputEST.date.min().strftime('%Y-%m-%d %H:%M'),
-            outputEST.date.max().strftime('%Y-%m-%d %H:%M')
+            estStart,
+            estEnd
         ]
         ),
         y=alt.Y('value:Q', title='Elevation (ft)').scale(domain=elevRange),
@@ -485,7 +375,7 @@ for reservoirName in ["ORO","NBB"]:
         ] + [alt.Tooltip('date:T', type='temporal', format='%Y-%m-%d %H:%M')]
     ).properties(title=reservoirNamesLookup[reservoirName])  # width=defaultwidth, height=200
                 
-    allZones = create_zone_rules(outputEST.date.min().strftime('%Y-%m-%d %H:%M'), outputEST.date.max().strftime('%Y-%m-%d %H:%M'), zones, elevRange)
+    allZones = create_zone_rules(estStart, estEnd, zones, elevRange)
 
     estElevPlot = (poolPlot + allZones)
 
@@ -507,15 +397,20 @@ for reservoirName in ["ORO","NBB"]:
     estElevPlot = (poolPlot +  allZones + rulesElev).resolve_scale(color='shared')
 
 
-    durationdf = calculateDurations(outputEST)
+    # Written by the converters at ingest; decoded here only for outputs without the companion table
+    durationdf = getDurations(estDf, reservoirName, pct)
+    if durationdf is None:
+        # Keyed by scenario, reservoir and pct rather than by hashing the series
+        durationdf = cachedDurations(estDf, (dataset, patternYear, arc_spillway_config, scaleFactor), reservoirName, pct,
+                                     lambda: estSeries.select(variable='DURATION').to_frame())
     durationPlot = alt.Chart(durationdf).mark_bar(height=5).encode(
         x=alt.X(
         'BeginDate:T',
         title=None,
         axis=alt.Axis(format='%Y-%m-%d', labels=True)
         ).scale(domain=[
-        outputEST.date.min().strftime('%Y-%m-%d %H:%M'),
-        outputEST.date.max().strftime('%Y-%m-%d %H:%M')
+        estStart,
+        estEnd
         ]),
         x2='EndDate:T',
         y=alt.Y('duration:N', title='Duration'),
@@ -584,4 +479,22 @@ with col1:
 with col2:
     st.altair_chart(rightPlot, use_container_width=True)
 
+cacheStats = TABLE_CACHE.stats()
+tableCacheCaption.caption(
+    f"Table cache: {cacheStats['tables']} tables, {cacheStats['bytes'] / 2**20:.0f} of "
+    f"{cacheStats['budget'] / 2**20:.0f} MB, {cacheStats['hits']} hits, {cacheStats['misses']} misses"
+)
+
+# Shared by every session on this server and counted after this rerun's lookups
+with st.sidebar.expander("Cache debug"):
+    durationStats = DURATION_CACHE.stats()
+    st.caption(
+        f"Duration cache: {durationStats['results']} of {durationStats['entries']} entries, "
+        f"{durationStats['hits']} hits, {durationStats['misses']} misses, {durationStats['evictions']} evictions"
+    )
+    st.caption(
+        f"Key {durationStats['key'] * 1e6:.0f} µs, hit {durationStats['hit'] * 1e6:.0f} µs, "
+        f"miss {durationStats['miss'] * 1e3:.1f} ms on average"
+    )
+
 
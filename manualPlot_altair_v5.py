@@ -1,43 +1,10 @@
 import altair as alt
 import pandas as pd
 from collections import namedtuple
-from pyarrow import dataset as ds
+from scenarioData import calculateDurations, getDurations, getESTSeries, getBaselineSeries, scenario_catalog
 import os
 alt.renderers.enable('browser')
 
-def getESTData(estDf, reservoirName, pct):
-
-    outputEST = estDf.to_table(filter = (
-            (ds.field('Reservoir') == reservoirName) & 
-            (ds.field('pct') == pct)
-    )).to_pandas()
-    
-
-    outputEST.loc[outputEST.variable == 'POOL-ELEV', 'alternative'] = "ID3-IMPERFECT"
-    outputEST.loc[outputEST.variable == 'FIRO-TARGET', 'alternative'] = "FIRO-TARGET"
-    outputEST.loc[outputEST.variable == f'{reservoirName}-OUT', 'alternative'] = f'{reservoirName}-OUT'
-    outputEST.loc[outputEST.variable == f'{reservoirName}-IN', 'alternative'] = f'{reservoirName}-IN'
-
-    return outputEST
-
-def getBaselineData(baselineDf, reservoirName):
-    outputPerfectZero = baselineDf.to_table(filter = (
-        (ds.field('reservoirName') == reservoirName) &
-        (ds.field('alternative') == "ID0")
-    )).to_pandas()
-    
-    outputPerfectOne = baselineDf.to_table(filter = (
-        (ds.field('reservoirName') == reservoirName) &
-        (ds.field('alternative') == "ID1")
-    )).to_pandas()
-
-    outputPerfectThree = baselineDf.to_table(filter = (
-        (ds.field('reservoirName') == reservoirName) &
-        (ds.field('alternative') == "ID3-PERFECT")
-    )).to_pandas()
-
-    return outputPerfectZero, outputPerfectOne, outputPerfectThree 
-
 def create_zone_rules(minDate, maxDate, zones, elevRange):
     
     def create_zone_df(label, value, minDate, maxDate):
@@ -101,89 +68,6 @@ def create_zone_rules(minDate, maxDate, zones, elevRange):
         
     return allZones
 
-def calculateDurations(outputEST):
-    durTable = outputEST.loc[outputEST.variable == 'DURATION', :].copy()
-    # Original lookup dictionary
-    lookup = {
-        7: "07-Day",
-        50: "05-Day",
-        57: "07-Day, 05-Day",
-        300: "03-Day",
-        307: "07-Day, 03-Day",
-        350: "05-Day, 03-Day",
-        357: "07-Day, 05-Day, 03-Day",
-        2000: "02-Day",
-        2007: "07-Day, 02-Day",
-        2050: "05-Day, 02-Day",
-        2057: "07-Day, 05-Day, 02-Day",
-        2300: "03-Day, 02-Day",
-        2307: "07-Day, 03-Day, 02-Day",
-        2350: "05-Day, 03-Day, 02-Day",
-        2357: "07-Day, 05-Day, 03-Day, 02-Day",
-        10000: "01-Day",
-        10007: "07-Day, 01-Day",
-        10050: "05-Day, 01-Day",
-        10057: "07-Day, 05-Day, 01-Day",
-        10300: "03-Day, 01-Day",
-        10307: "07-Day, 03-Day, 01-Day",
-        10350: "05-Day, 03-Day, 01-Day",
-        10357: "07-Day, 05-Day, 03-Day, 01-Day",
-        12000: "02-Day, 01-Day",
-        12007: "07-Day, 02-Day, 01-Day",
-        12050: "05-Day, 02-Day, 01-Day",
-        12057: "07-Day, 05-Day, 02-Day, 01-Day",
-        12300: "03-Day, 02-Day, 01-Day",
-        12307: "07-Day, 03-Day, 02-Day, 01-Day",
-        12350: "05-Day, 03-Day, 02-Day, 01-Day",
-        12357: "07-Day, 05-Day, 03-Day, 02-Day, 01-Day",
-    }
-
-    # Map the 'value' column to the 'durations' column using the combined lookup dictionary
-    durTable['durations'] = durTable.loc[:,'value'].map(lambda x: lookup.get(x, '').split(', '))
-
-    # Drop rows with NaN values in the 'durations' column
-    durTable = durTable.loc[durTable.value>0, :]
-
-    # Explode the 'durations' column to repeat each row for each element in the list
-    durTable = durTable.explode('durations')
-
-    # Reset the index if needed
-    durTable = durTable.reset_index(drop=True)
-    durTable.loc[:,'value'] = pd.to_numeric(durTable.durations.str.split('-', expand=True)[0])
-
-    # Assuming durTable is your DataFrame and 'durations' is the column with the duration labels
-    output = pd.DataFrame()
-
-    for duration, sub_group in durTable.groupby('durations'):
-        # Create a date range with 6-hour frequency
-        idx = pd.date_range(sub_group.date.min(), sub_group.date.max(), freq="6h")
-
-        # Drop unnecessary columns and reindex with the new date range
-        sub_group = sub_group.drop(['durations', 'variable'], axis=1)
-        sub_group = sub_group.set_index('date').reindex(idx, fill_value=-99, tolerance='1h', method='nearest')
-        sub_group.index.name = 'date'
-        sub_group = sub_group.reset_index()
-
-        # Set value to 1 where it is not -99, otherwise set to 0
-        sub_group['value'] = sub_group['value'].apply(lambda x: 1 if x != -99 else 0)
-
-        # Create a group identifier for consecutive values
-        sub_group['val_grp'] = (sub_group['value'].astype(bool)).astype(int)
-        sub_group['val_grp'] = (sub_group['val_grp'].diff(1) != 0).astype('int').cumsum()
-        sub_group = sub_group[sub_group['value'] != 0]
-
-        # Create a DataFrame with the results
-        res = sub_group.groupby('val_grp').agg(
-            BeginDate=('date', 'first'),
-            EndDate=('date', 'last'),
-            Consecutive=('date', 'size')
-        ).reset_index(drop=True)
-        res['duration'] = duration
-
-        # Concatenate the results to the output DataFrame
-        output = pd.concat([output, res], ignore_index=True)
-    return output
-
 reservoirNamesLookup = {
     "ORO": "Oroville",
     "NBB": "New Bullards Bar"
@@ -213,6 +97,8 @@ datasets_options = ['HDR_proposals','FVA_config']
 
 scaleFactors = [84,86,88,90,92,94,96,98,100,102,104,106,108,110,120]
 
+catalog = scenario_catalog('data')
+
 for scaleFactor in scaleFactors:
 
     dataset = 'NBB_Release'
@@ -241,11 +127,14 @@ for scaleFactor in scaleFactors:
         "NBB": nbbZones
     }
 
-    estFeatherFile = f"data/{patternYear}_{scaleFactor}_{arc_spillway_config}_{dataset}_Alt3.feather"
-    baselineFeatherFile = f'data/{patternYear}_{scaleFactor}_{arc_spillway_config}_baseline.feather'
+    estDf = catalog.open(dataset, patternYear, arc_spillway_config, scaleFactor)
+    baselineDf = catalog.open('baseline', patternYear, arc_spillway_config, scaleFactor)
+    if estDf is None or baselineDf is None:
+        print(f"No {dataset} or baseline output for {patternYear} {arc_spillway_config} scale {scaleFactor}, skipped")
+        continue
 
-    estDf = ds.dataset(estFeatherFile, format = 'feather')
-    baselineDf = ds.dataset(baselineFeatherFile, format = 'feather')
+    # The only columns the charts use; the label and index columns are not loaded
+    chartColumns = ['date', 'variable', 'value', 'alternative']
 
     graphics = {}
 
@@ -265,29 +154,31 @@ for scaleFactor in scaleFactors:
         flowRange = flowRangeLookup[reservoirName]
 
 
-        outputEST = getESTData(estDf, reservoirName, pct)
+        estSeries = getESTSeries(estDf, reservoirName, pct, columns=chartColumns)
+        estStart = min(series.date.min() for series in estSeries.values()).strftime('%Y-%m-%d %H:%M')
+        estEnd = max(series.date.max() for series in estSeries.values()).strftime('%Y-%m-%d %H:%M')
 
 
-        outputPerfectZero, outputPerfectOne, outputPerfectThree = getBaselineData(baselineDf, reservoirName)
+        perfectZeroSeries, perfectOneSeries, perfectThreeSeries = getBaselineSeries(baselineDf, reservoirName, columns=chartColumns)
 
         # Create a list of dataframes containing the desired variables
         dataframes = [
-            outputEST.loc[outputEST["variable"] == "POOL-ELEV", :],
-            outputEST.loc[outputEST["variable"] == "FIRO-TARGET", :],
-            outputPerfectZero.loc[outputPerfectZero["variable"] == "POOL-ELEV", :],
-            outputPerfectOne.loc[outputPerfectOne["variable"] == "POOL-ELEV", :],
-            outputPerfectThree.loc[outputPerfectThree["variable"] == "POOL-ELEV", :],
+            estSeries.rows("POOL-ELEV"),
+            estSeries.rows("FIRO-TARGET"),
+            perfectZeroSeries.rows("POOL-ELEV"),
+            perfectOneSeries.rows("POOL-ELEV"),
+            perfectThreeSeries.rows("POOL-ELEV"),
         ]
 
         # Concatenate the dataframes into a single dataframe
         elevDf = pd.concat(dataframes)
 
         dataframes = [
-            outputEST.loc[outputEST["variable"] == f'{reservoirName}-OUT', :],
-            outputEST.loc[outputEST["variable"] == f'{reservoirName}-IN', :],
-            outputPerfectZero.loc[outputPerfectZero["variable"] == f'{reservoirName}-OUT', :],
-            outputPerfectOne.loc[outputPerfectOne["variable"] == f'{reservoirName}-OUT', :],
-            outputPerfectThree.loc[outputPerfectThree["variable"] == f'{reservoirName}-OUT', :],
+            estSeries.rows(f'{reservoirName}-OUT'),
+            estSeries.rows(f'{reservoirName}-IN'),
+            perfectZeroSeries.rows(f'{reservoirName}-OUT'),
+            perfectOneSeries.rows(f'{reservoirName}-OUT'),
+            perfectThreeSeries.rows(f'{reservoirName}-OUT'),
         ]
 
         
@@ -329,7 +220,7 @@ for scaleFactor in scaleFactors:
 
         flowPlot = (flowPlot + rules)
 
-        flowMaryDf = outputEST.loc[outputEST["variable"] == "MARYSVILLE", :]
+        flowMaryDf = estSeries.rows("MARYSVILLE")
         maryThreshold = 180000
         flowMary = alt.Chart(flowMaryDf).mark_line().encode(
                 x=alt.X('date:T', title=None).axis(format='%Y-%m-%d'
@@ -358,7 +249,7 @@ for scaleFactor in scaleFactors:
 
         maryFlow = (flowMary + highlightMary + rulesMary).properties( title = "Marysville")#width=defaultwidth,  height=100,
 
-        flowYubaCityDf = outputEST.loc[outputEST["variable"] == "YUBA CITY", :]
+        flowYubaCityDf = estSeries.rows("YUBA CITY")
         yubaThreshold = 180000
         flowYubaCity = alt.Chart(flowYubaCityDf).mark_line().encode(
                 x=alt.X('date:T', title=None).axis(format='%Y-%m-%d'
@@ -388,7 +279,7 @@ for scaleFactor in scaleFactors:
 
         yubaFlow = (flowYubaCity + highlightYubaCity+ rulesYuba).properties(  title = "Yuba City")#width=defaultwidth, height=100,
 
-        flowNicolausDf = outputEST.loc[outputEST["variable"] == "NICOLAUS", :]
+        flowNicolausDf = estSeries.rows("NICOLAUS")
         nicolausThreshold = 320000
         flowNicolaus = alt.Chart(flowNicolausDf).mark_line().encode(
                 x=alt.X('date:T', title=None).axis(format='%Y-%m-%d'
@@ -417,7 +308,7 @@ for scaleFactor in scaleFactors:
 
         nicolausFlow = (flowNicolaus + highlightNicolaus + rulesNicolaus).properties(  title = "Nicolaus")#width=defaultwidth, height=100,
 
-        flowConfluenceDf = outputEST.loc[outputEST["variable"] == "CONFLUENCE", :]
+        flowConfluenceDf = estSeries.rows("CONFLUENCE")
         confluenceThreshold = 300000
 
         flowConfluence = alt.Chart(flowConfluenceDf).mark_line().encode(
@@ -455,8 +346,8 @@ for scaleFactor in scaleFactors:
             axis=alt.Axis(format='%Y-%m-%d', labels=True)
             ).scale(
             domain=[
-                outputEST.date.min().strftime('%Y-%m-%d %H:%M'),
-                outputEST.date.max().strftime('%Y-%m-%d %H:%M')
+                estStart,
+                estEnd
             ]
             ),
             y=alt.Y('value:Q', title='Elevation (ft)').scale(domain=elevRange),
@@ -481,7 +372,7 @@ for scaleFactor in scaleFactors:
             ] + [alt.Tooltip('date:T', type='temporal', format='%Y-%m-%d %H:%M')]
         ).properties(title=reservoirNamesLookup[reservoirName])  # width=defaultwidth, height=200
                     
-        allZones = create_zone_rules(outputEST.date.min().strftime('%Y-%m-%d %H:%M'), outputEST.date.max().strftime('%Y-%m-%d %H:%M'), zones, elevRange)
+        allZones = create_zone_rules(estStart, estEnd, zones, elevRange)
 
         estElevPlot = (poolPlot + allZones)
 
@@ -503,15 +394,17 @@ for scaleFactor in scaleFactors:
         estElevPlot = (poolPlot +  allZones + rulesElev).resolve_scale(color='shared')
 
 
-        durationdf = calculateDurations(outputEST)
+        durationdf = getDurations(estDf, reservoirName, pct)
+        if durationdf is None:
+            durationdf = calculateDurations(estSeries.rows('DURATION'))
         durationPlot = alt.Chart(durationdf).mark_bar(height=5).encode(
             x=alt.X(
             'BeginDate:T',
             title=None,
             axis=alt.Axis(format='%Y-%m-%d', labels=True)
             ).scale(domain=[
-            outputEST.date.min().strftime('%Y-%m-%d %H:%M'),
-            outputEST.date.max().strftime('%Y-%m-%d %H:%M')
+            estStart,
+            estEnd
             ]),
             x2='EndDate:T',
             y=alt.Y('duration:N', title='Duration'),
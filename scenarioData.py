@@ -0,0 +1,1062 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather
+import pyarrow.parquet as pq
+from pyarrow import dataset as ds
+from pyarrow import fs
+import pandas as pd
+import numpy as np
+from collections import OrderedDict
+from collections.abc import Mapping
+import glob
+import itertools
+import os
+import re
+import threading
+import time
+
+
+# Hive partitioning written by the converters' --partitioned mode:
+# ROOT/dataset=<name|baseline>/year=<year>/config=<With|Without>/scale=<pct>/
+PARTITIONING = ds.partitioning(pa.schema([
+    ('dataset', pa.string()),
+    ('year', pa.int32()),
+    ('config', pa.string()),
+    ('scale', pa.int32()),
+]), flavor='hive')
+PARTITION_KEYS = PARTITIONING.schema.names
+
+
+# Opt-in memory-mapped reads (SCENARIO_MMAP=1). Scenario datasets are then
+# opened on a memory-mapping filesystem: a whole-file read of an output
+# written uncompressed (--compression none) points into the OS page cache
+# instead of fresh buffers, so the cached tables of every session and
+# server process share one copy of each file. Compressed files are still
+# decompressed into memory. The converters overwrite outputs in place, so
+# do not regenerate files under a running app with memory mapping on.
+MEMORY_MAP = os.environ.get('SCENARIO_MMAP', '0') == '1'
+
+
+def scenario_filesystem():
+    return fs.LocalFileSystem(use_mmap=MEMORY_MAP)
+
+
+def _legacy_type(arrowType):
+    # Compact files store labels as dictionary<int8, string>, pct as int8 and
+    # may store value as float32; hand the plotting code the original types
+    if pa.types.is_dictionary(arrowType):
+        return arrowType.value_type
+    if pa.types.is_floating(arrowType):
+        return pa.float64()
+    if pa.types.is_integer(arrowType):
+        return pa.int64()
+    return arrowType
+
+
+def scenario_file(stem, layout='long'):
+    # One converter output, e.g. scenario_file('data/1997_100_With_FVA_config_Alt3').
+    # A --format parquet output is preferred when present: its row-group
+    # statistics let the Reservoir/pct filters skip most of the file, where
+    # a feather file is scanned in full (scenario_table keeps those filters
+    # in the scan for parquet). layout='wide' opens the
+    # --layout wide output (<stem>.wide.parquet or <stem>.wide.feather).
+    if layout == 'wide':
+        stem += '.wide'
+    if os.path.exists(stem + '.parquet'):
+        return ds.dataset(stem + '.parquet', format='parquet')
+    return ds.dataset(stem + '.feather', format='feather', filesystem=scenario_filesystem())
+
+
+def scenario_layout(stem):
+    # 'wide' when a --layout wide output exists for stem, else 'long'
+    if os.path.exists(stem + '.wide.parquet') or os.path.exists(stem + '.wide.feather'):
+        return 'wide'
+    return 'long'
+
+
+# Scenario file names the converters write: flat outputs in data/, e.g.
+# 1997_100_With_FVA_config_Alt3.feather, 1986_120_Without_baseline.wide.parquet,
+# and --partitioned outputs, dataset=<name>/year=<year>/config=<config>/scale=<scale>/part-0.feather
+# (wide-0 for --layout wide) under a dataset root
+SCENARIO_NAME = re.compile(
+    r'(?P<year>\d{4})_(?P<scale>\d+)_(?P<config>With|Without)_(?:(?P<dataset>.+)_Alt3|baseline)'
+    r'(?P<wide>\.wide)?\.(?P<format>feather|parquet)$'
+)
+PARTITION_NAME = re.compile(
+    r'(?:^|/)dataset=(?P<dataset>[^/]+)/year=(?P<year>\d+)/config=(?P<config>[^/]+)/scale=(?P<scale>\d+)/'
+    r'(?P<layout>part|wide)-0\.(?P<format>feather|parquet)$'
+)
+
+
+def scenario_name(fileName):
+    # {dataset, year, config, scale, layout, format} for a flat output's file
+    # name, or None if it is not one; baseline outputs have dataset 'baseline'
+    match = SCENARIO_NAME.match(fileName)
+    if match is None:
+        return None
+    return {
+        'dataset': match['dataset'] or 'baseline', 'year': int(match['year']), 'config': match['config'],
+        'scale': int(match['scale']), 'layout': 'wide' if match['wide'] else 'long', 'format': match['format'],
+    }
+
+
+def partition_name(path):
+    # As scenario_name for a --partitioned output's path
+    match = PARTITION_NAME.search(path.replace(os.sep, '/'))
+    if match is None:
+        return None
+    return {
+        'dataset': match['dataset'], 'year': int(match['year']), 'config': match['config'],
+        'scale': int(match['scale']), 'layout': 'wide' if match['layout'] == 'wide' else 'long',
+        'format': match['format'],
+    }
+
+
+# One row per scenario file under a data root: its partition keys, where and
+# how it is stored, its row count, the first row of each record batch (row
+# group for parquet), its date extent and the pct and reservoir labels it
+# holds (pcts is null for baseline outputs)
+CATALOG_SCHEMA = pa.schema(list(PARTITIONING.schema) + [
+    ('layout', pa.string()),
+    ('format', pa.string()),
+    ('partitioned', pa.bool_()),
+    ('path', pa.string()),
+    ('size', pa.int64()),
+    ('mtime_ns', pa.int64()),
+    ('num_rows', pa.int64()),
+    ('batch_offsets', pa.list_(pa.int64())),
+    ('start', pa.timestamp('ns')),
+    ('end', pa.timestamp('ns')),
+    ('pcts', pa.list_(pa.int64())),
+    ('reservoirs', pa.list_(pa.string())),
+])
+CATALOG_FILE = '_catalog.feather'
+
+
+def _scenario_files(root):
+    # {path: (name fields, partitioned, stat)} of every scenario file under root
+    files = {}
+    for directory, subdirectories, fileNames in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith(('.', '_')))
+        for fileName in sorted(fileNames):
+            path = os.path.join(directory, fileName)
+            fields = scenario_name(fileName)
+            partitioned = fields is None
+            if partitioned:
+                fields = partition_name(path)
+            if fields is not None:
+                files[path] = (fields, partitioned, os.stat(path))
+    return files
+
+
+def _unique(column):
+    return sorted(value for value in pc.unique(column).to_pylist() if value is not None)
+
+
+def _scan_file(path, format):
+    # (num_rows, batch_offsets, start, end, pcts, reservoirs) from the file
+    # footer and the date and label columns; values are never read
+    labels = ['date', 'Reservoir', 'pct', 'reservoirName']
+    if format == 'parquet':
+        parquetFile = pq.ParquetFile(path)
+        rows = [parquetFile.metadata.row_group(i).num_rows for i in range(parquetFile.metadata.num_row_groups)]
+        table = parquetFile.read(columns=[name for name in labels if name in parquetFile.schema_arrow.names])
+    else:
+        with pa.memory_map(path) as source:
+            names = pa.ipc.open_file(source).schema.names
+            reader = pa.ipc.open_file(source, options=pa.ipc.IpcReadOptions(
+                included_fields=[names.index(name) for name in labels if name in names]))
+            batches = [reader.get_batch(i) for i in range(reader.num_record_batches)]
+            table = pa.Table.from_batches(batches, schema=reader.schema)
+            rows = [batch.num_rows for batch in batches]
+    extent = pc.min_max(table['date']) if 'date' in table.column_names else {'min': None, 'max': None}
+    reservoirColumn = 'Reservoir' if 'Reservoir' in table.column_names else 'reservoirName'
+    return {
+        'num_rows': sum(rows),
+        'batch_offsets': list(itertools.accumulate([0] + rows[:-1])) if rows else [],
+        'start': extent['min'].as_py(),
+        'end': extent['max'].as_py(),
+        'pcts': _unique(table['pct']) if 'pct' in table.column_names else None,
+        'reservoirs': _unique(table[reservoirColumn]) if reservoirColumn in table.column_names else [],
+    }
+
+
+def build_catalog(root='data', previous=None, files=None):
+    # The catalog table of every scenario file under root, flat or
+    # --partitioned. Rows of a previous catalog are reused for files whose
+    # size and modification time have not changed. files is root's
+    # _scenario_files() when the caller has already walked it.
+    if files is None:
+        files = _scenario_files(root)
+    reuse = {}
+    if previous is not None:
+        reuse = {row['path']: row for row in previous.to_pylist()}
+    rows = []
+    for path, (fields, partitioned, stat) in files.items():
+        row = reuse.get(path)
+        if row is None or (row['size'], row['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+            row = dict(fields, partitioned=partitioned, path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+                       **_scan_file(path, fields['format']))
+        rows.append(row)
+    return pa.Table.from_pylist(rows, schema=CATALOG_SCHEMA)
+
+
+def _catalog_signature(files):
+    # Changes whenever a scenario file is added, removed or rewritten
+    latest = max((stat.st_mtime_ns for _, _, stat in files.values()), default=0)
+    return f"{len(files)}:{sum(stat.st_size for _, _, stat in files.values())}:{latest}".encode()
+
+
+def scenario_catalog(root='data'):
+    # ScenarioCatalog of root, kept in root/_catalog.feather. The file is
+    # reused while no scenario file has changed since it was written, and
+    # otherwise rebuilt (reading only the files that changed); a root that
+    # cannot be written to just rebuilds it in memory each time.
+    path = os.path.join(root, CATALOG_FILE)
+    files = _scenario_files(root)
+    signature = _catalog_signature(files)
+    previous = None
+    try:
+        with pa.memory_map(path) as source:
+            previous = pa.ipc.open_file(source).read_all()
+    except (OSError, pa.ArrowInvalid):
+        pass
+    if previous is not None and not previous.schema.equals(CATALOG_SCHEMA):
+        previous = None
+    if previous is not None and (previous.schema.metadata or {}).get(b'signature') == signature:
+        return ScenarioCatalog(previous)
+
+    table = build_catalog(root, previous, files)
+    table = table.replace_schema_metadata({'signature': signature})
+    try:
+        pa.feather.write_feather(table, path)
+    except OSError:
+        pass
+    return ScenarioCatalog(table)
+
+
+class ScenarioCatalog:
+    # The files of a catalog table indexed by (dataset, year, config, scale).
+    # A scenario with several files (layouts, formats, a partitioned copy)
+    # resolves to the --partitioned one first, then wide before long and
+    # parquet before feather, as scenario_file/scenario_layout prefer.
+
+    def __init__(self, table):
+        self.table = table
+        self._files = {}
+        for row in table.to_pylist():
+            self._files.setdefault(tuple(row[key] for key in PARTITION_KEYS), []).append(row)
+        for rows in self._files.values():
+            rows.sort(key=lambda row: (not row['partitioned'], row['layout'] != 'wide', row['format'] != 'parquet'))
+        self._datasets = {}
+
+    def __len__(self):
+        return len(self._files)
+
+    def entry(self, dataset, year, config, scale):
+        # The catalog row of the scenario's preferred file, or None
+        rows = self._files.get((dataset, int(year), config, int(scale)))
+        return rows[0] if rows else None
+
+    def open(self, dataset, year, config, scale):
+        # pyarrow dataset of the scenario's preferred file, or None if the
+        # scenario has no file; opened once per catalog
+        row = self.entry(dataset, year, config, scale)
+        if row is None:
+            return None
+        scenario = self._datasets.get(row['path'])
+        if scenario is None:
+            if row['partitioned']:
+                # root/dataset=.../year=.../config=.../scale=.../part-0.feather
+                base = row['path']
+                for _ in range(len(PARTITION_KEYS) + 1):
+                    base = os.path.dirname(base)
+                scenario = ds.dataset([row['path']], format=row['format'], partitioning=PARTITIONING,
+                                      partition_base_dir=base, filesystem=scenario_filesystem())
+            else:
+                scenario = ds.dataset(row['path'], format=row['format'], filesystem=scenario_filesystem())
+            self._datasets[row['path']] = scenario
+        return scenario
+
+    def scenarios(self):
+        # (dataset, year, config, scale) of every EST scenario that has a
+        # baseline output for the same year, config and scale
+        return sorted(
+            key for key in self._files
+            if key[0] != 'baseline' and ('baseline',) + key[1:] in self._files
+        )
+
+    def options(self, key, **selected):
+        # Values of one partition key among scenarios() matching the
+        # selected ones, e.g. options('scale', dataset='NBB_Release', year=1997, config='With')
+        position = PARTITION_KEYS.index(key)
+        return sorted({
+            scenario[position] for scenario in self.scenarios()
+            if all(scenario[PARTITION_KEYS.index(name)] == value for name, value in selected.items())
+        })
+
+
+def window_filter(window):
+    # Rows of a [start, end] date window, both ends included; either end
+    # may be None. None for no window.
+    if window is None:
+        return None
+    expression = None
+    start, end = window
+    if start is not None:
+        expression = ds.field('date') >= pd.Timestamp(start)
+    if end is not None:
+        term = ds.field('date') <= pd.Timestamp(end)
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def _combine(filter, other):
+    if filter is None:
+        return other
+    return filter if other is None else filter & other
+
+
+def _scan(dataset, filter=None, columns=None):
+    # read_table without the legacy casts: labels, pct and value as stored
+    if columns is None and any(name in PARTITION_KEYS for name in dataset.schema.names):
+        columns = [name for name in dataset.schema.names if name not in PARTITION_KEYS]
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+def _legacy_table(table):
+    # table with the compact label, pct and float32 value types widened (see _legacy_type)
+    schema = pa.schema(
+        [(field.name, _legacy_type(field.type)) for field in table.schema],
+        metadata=table.schema.metadata
+    )
+    if schema != table.schema:
+        table = table.cast(schema)
+    return table
+
+
+def read_table(dataset, filter=None, columns=None):
+    # Partition key columns are left out, so a scenario read from its
+    # --partitioned copy has the same columns as one read from its own
+    # feather file. columns projects the scan.
+    return _legacy_table(_scan(dataset, filter=filter, columns=columns))
+
+
+class TableCache:
+    # Process-wide LRU store of whole scenario tables. Module state lives as
+    # long as the server process, so every session of the app shares it.
+    # Tables are evicted least recently used first once their bytes exceed
+    # budget; a table larger than the budget is returned without being kept.
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                self.hits += 1
+                return table
+            self.misses += 1
+
+        # Read outside the lock so sessions loading other scenarios are not held up
+        table = load()
+        with self._lock:
+            if key not in self._tables and table.nbytes <= self.budget:
+                self._tables[key] = table
+                self.nbytes += table.nbytes
+                while self.nbytes > self.budget:
+                    _, evicted = self._tables.popitem(last=False)
+                    self.nbytes -= evicted.nbytes
+                    self.evictions += 1
+        return table
+
+    def stats(self):
+        with self._lock:
+            return {
+                'tables': len(self._tables), 'bytes': self.nbytes, 'budget': self.budget,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self.nbytes = 0
+
+
+# Byte budget of the shared table cache, from SCENARIO_CACHE_MB (default 512)
+TABLE_CACHE = TableCache(int(os.environ.get('SCENARIO_CACHE_MB', '512')) * 2**20)
+
+
+class ResultCache:
+    # Process-wide LRU store of results derived from a scenario, such as its
+    # duration bars, kept under a small key (dataset, year, config, scale,
+    # reservoir, pct, ...) instead of a hash of the data they were computed
+    # from. At most `entries` results are kept, least recently used evicted
+    # first. Besides hits and misses it times building the keys, serving
+    # hits and computing misses, for the app's cache panel.
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.keySeconds = 0.0
+        self.hitSeconds = 0.0
+        self.missSeconds = 0.0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, makeKey, compute):
+        # compute() cached under makeKey(); both are called here so their cost is counted
+        start = time.perf_counter()
+        key = makeKey()
+        keyed = time.perf_counter()
+        with self._lock:
+            self.keySeconds += keyed - start
+            if key in self._results:
+                self._results.move_to_end(key)
+                result = self._results[key]
+                self.hits += 1
+                self.hitSeconds += time.perf_counter() - keyed
+                return result
+            self.misses += 1
+
+        result = compute()
+        with self._lock:
+            self.missSeconds += time.perf_counter() - keyed
+            if self.entries > 0 and key not in self._results:
+                self._results[key] = result
+                while len(self._results) > self.entries:
+                    self._results.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def stats(self):
+        # Mean seconds per lookup for keys, per hit and per miss
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'results': len(self._results), 'entries': self.entries,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'key': self.keySeconds / lookups if lookups else 0.0,
+                'hit': self.hitSeconds / self.hits if self.hits else 0.0,
+                'miss': self.missSeconds / self.misses if self.misses else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+# Entry limit of the shared duration cache, from DURATION_CACHE_ENTRIES (default 256)
+DURATION_CACHE = ResultCache(int(os.environ.get('DURATION_CACHE_ENTRIES', '256')))
+
+
+def scenario_key(dataset):
+    # Identity of a scenario dataset: its files with their size and
+    # modification time, so a regenerated output is read again
+    key = []
+    for path in dataset.files:
+        stat = os.stat(path)
+        key.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(key)
+
+
+def scenario_table(dataset, filter=None, columns=None):
+    # read_table(dataset, filter, columns=columns) served from TABLE_CACHE.
+    # A feather scenario is read whole once, as stored (compact labels,
+    # float32 values and memory-mapped buffers stay as they are on disk),
+    # and each filter and projection is applied in memory before the
+    # legacy casts. A feather scan reads the whole file anyway, but a
+    # parquet one skips row groups, so parquet reads keep the filter and
+    # projection in the scan and cache each slice under its own key. With
+    # the cache disabled (SCENARIO_CACHE_MB=0) every read is pushed into
+    # the scan, for one-pass batch readers.
+    if TABLE_CACHE.budget <= 0:
+        return read_table(dataset, filter=filter, columns=columns)
+    if isinstance(dataset.format, ds.ParquetFileFormat):
+        key = (scenario_key(dataset), str(filter), None if columns is None else tuple(columns))
+        return _legacy_table(TABLE_CACHE.get(key, lambda: _scan(dataset, filter=filter, columns=columns)))
+    table = TABLE_CACHE.get(scenario_key(dataset), lambda: _scan(dataset))
+    if filter is not None:
+        table = table.filter(filter)
+    return _legacy_table(table if columns is None else table.select(columns))
+
+
+def estAlternatives(reservoirName):
+    # alternative label the plots use for each EST variable; others are left NaN
+    return {
+        'POOL-ELEV': "ID3-IMPERFECT",
+        'FIRO-TARGET': "FIRO-TARGET",
+        f'{reservoirName}-OUT': f'{reservoirName}-OUT',
+        f'{reservoirName}-IN': f'{reservoirName}-IN',
+    }
+
+
+def _encoded(column):
+    # A string or dictionary column as one dictionary shared by all its chunks
+    if pa.types.is_dictionary(column.type):
+        column = column.cast(column.type.value_type)
+    return column.dictionary_encode()
+
+
+def _mapped(column, mapping):
+    # column's values looked up in mapping; values it lacks become null.
+    # Only the distinct values are looked up: the mapped dictionary is
+    # gathered back through the indices.
+    encoded = _encoded(column)
+    if not encoded.num_chunks:
+        return pa.chunked_array([], pa.string())
+    dictionary = encoded.chunk(0).dictionary.to_pylist()
+    values = pa.array([mapping.get(value) for value in dictionary], pa.string())
+    return pa.chunked_array([values.take(chunk.indices) for chunk in encoded.chunks], pa.string())
+
+
+def split_by(table, column):
+    # {value: rows} for each value of column, in order of first appearance
+    # and with the rows in table order, as groupby(column, sort=False).
+    # One stable sort of the dictionary indices and one take group the
+    # rows; each group is then a zero-copy slice.
+    if table.num_rows == 0:
+        return {}
+    encoded = _encoded(table[column])
+    indices = pa.chunked_array([chunk.indices for chunk in encoded.chunks])
+    grouped = table.take(pc.sort_indices(indices))
+    # Rows without a value sort last and are left out
+    counts = np.bincount(pc.drop_null(indices).to_numpy(), minlength=len(encoded.chunk(0).dictionary))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return {
+        value: grouped.slice(offsets[i], counts[i])
+        for i, value in enumerate(encoded.chunk(0).dictionary.to_pylist())
+        if counts[i]
+    }
+
+
+class ScenarioFrame(Mapping):
+    # A loaded frame (pandas or Arrow) partitioned by variable in one pass,
+    # so plot builders look each variable up, frame['POOL-ELEV'], instead
+    # of masking the whole frame once per variable. Variables iterate in
+    # order of first appearance and each view keeps the frame's row order
+    # and index, as groupby(key, sort=False). A pandas frame is grouped by
+    # one factorize and stable argsort and a variable's rows are taken on
+    # first access; an Arrow table is grouped by split_by.
+
+    def __init__(self, frame, key='variable'):
+        self.frame = frame
+        self.key = key
+        if isinstance(frame, pa.Table):
+            self._views = split_by(frame, key)
+            self._positions = dict.fromkeys(self._views)
+            return
+        codes, values = pd.factorize(frame[key])
+        # Rows without a key (code -1) sort first and are left out
+        order = np.argsort(codes, kind='stable')[np.count_nonzero(codes < 0):]
+        ends = np.cumsum(np.bincount(codes[codes >= 0], minlength=len(values)))
+        starts = np.concatenate([[0], ends[:-1]])
+        self._positions = {value: order[start:end] for value, start, end in zip(values, starts, ends)}
+        self._views = {}
+
+    @classmethod
+    def from_views(cls, views, key='variable'):
+        # A ScenarioFrame over rows already built per variable, e.g. from a
+        # --layout wide output; frame is their concatenation
+        views = dict(views)
+        first = next(iter(views.values()), None)
+        if isinstance(first, pa.Table):
+            frame = pa.concat_tables(views.values())
+        else:
+            frame = pd.concat(views.values()) if views else pd.DataFrame(columns=[key])
+        scenario = cls.__new__(cls)
+        scenario.frame, scenario.key, scenario._views = frame, key, views
+        scenario._positions = dict.fromkeys(views)
+        return scenario
+
+    def __getitem__(self, variable):
+        view = self._views.get(variable)
+        if view is None:
+            view = self._views[variable] = self.frame.take(self._positions[variable])
+        return view
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, variable):
+        return variable in self._positions
+
+    def rows(self, variable):
+        # The variable's rows, or none (with the frame's columns) if it has none
+        if variable in self:
+            return self[variable]
+        return self.frame.slice(0, 0) if isinstance(self.frame, pa.Table) else self.frame.iloc[:0]
+
+
+class ScenarioSeries:
+    # Series of one scenario selection on a shared time axis: times is one
+    # datetime64[ns] axis, values a (series x time) float array with NaN
+    # where a series has no value for an hour, and variables/alternatives
+    # one label per series (alternative is None for EST variables without
+    # one). A long frame spends a timestamp and two label strings per value;
+    # this spends them per series. to_frame() is the long
+    # date/variable/value/alternative frame the Altair charts take.
+
+    __slots__ = ('times', 'values', 'variables', 'alternatives')
+
+    def __init__(self, times, values, variables, alternatives):
+        self.times = times
+        self.values = values
+        self.variables = variables
+        self.alternatives = alternatives
+
+    @classmethod
+    def from_long(cls, table):
+        # From a long Arrow table (date, variable, value and, for baseline
+        # outputs, alternative); series are keyed by variable and
+        # alternative in order of first appearance
+        times, hours = np.unique(table['date'].to_numpy(), return_inverse=True)
+        code = np.zeros(table.num_rows, dtype=np.int64)
+        labels = {}
+        for name in ['alternative', 'variable']:
+            if name not in table.column_names:
+                continue
+            encoded = _encoded(table[name])
+            labels[name] = np.array(encoded.chunk(0).dictionary.to_pylist() if encoded.num_chunks else [], dtype=object)
+            indices = np.concatenate([chunk.indices.to_numpy(zero_copy_only=False) for chunk in encoded.chunks] or [[]])
+            code = code * max(len(labels[name]), 1) + indices.astype(np.int64)
+        rows, keys = pd.factorize(code)
+        values = np.full((len(keys), len(times)), np.nan)
+        values[rows, hours] = table['value'].to_numpy()
+
+        variableCount = max(len(labels['variable']), 1)
+        variables = labels['variable'][keys % variableCount]
+        if 'alternative' in labels:
+            alternatives = labels['alternative'][keys // variableCount]
+        else:
+            alternatives = np.full(len(keys), None, dtype=object)
+        return cls(times, values, variables, alternatives)
+
+    @classmethod
+    def from_wide(cls, table, alternative=None):
+        # From a --layout wide Arrow table of one reservoir (and alternative);
+        # variable columns without any value are left out
+        times, hours = np.unique(table['date'].to_numpy(), return_inverse=True)
+        variables, rows = [], []
+        for name in table.column_names:
+            if name in ('date', 'Reservoir', 'pct', 'alternative', 'reservoirName') or not pc.any(pc.is_valid(table[name])).as_py():
+                continue
+            row = np.full(len(times), np.nan)
+            row[hours] = table[name].to_numpy().astype(np.float64)
+            variables.append(name)
+            rows.append(row)
+        values = np.vstack(rows) if rows else np.empty((0, len(times)))
+        return cls(times, values, np.array(variables, dtype=object), np.full(len(variables), alternative, dtype=object))
+
+    @classmethod
+    def stack(cls, *series):
+        # One ScenarioSeries with the series of each in order; the time axes
+        # are merged when they differ
+        times = series[0].times
+        if any(not np.array_equal(part.times, times) for part in series[1:]):
+            times = np.unique(np.concatenate([part.times for part in series]))
+        values = []
+        for part in series:
+            if part.times is times or np.array_equal(part.times, times):
+                values.append(part.values)
+            else:
+                aligned = np.full((len(part), len(times)), np.nan)
+                aligned[:, np.searchsorted(times, part.times)] = part.values
+                values.append(aligned)
+        return cls(
+            times, np.vstack(values),
+            np.concatenate([part.variables for part in series]), np.concatenate([part.alternatives for part in series])
+        )
+
+    def __len__(self):
+        return len(self.variables)
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.values.nbytes + self.variables.nbytes + self.alternatives.nbytes
+
+    def select(self, variable=None, alternative=None):
+        # The series of one variable or alternative (or a list of them, in
+        # that order), e.g. baseline.select(variable='POOL-ELEV')
+        rows = np.arange(len(self))
+        for labels, wanted in [(self.alternatives, alternative), (self.variables, variable)]:
+            if wanted is None:
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            order = {value: i for i, value in enumerate(wanted)}
+            rows = np.array(sorted((row for row in rows if labels[row] in order), key=lambda row: order[labels[row]]),
+                            dtype=np.int64)
+        return ScenarioSeries(self.times, self.values[rows], self.variables[rows], self.alternatives[rows])
+
+    def relabel(self, mapping):
+        # The same series with alternative labels renamed through mapping
+        alternatives = np.array([mapping.get(label, label) for label in self.alternatives], dtype=object)
+        return ScenarioSeries(self.times, self.values, self.variables, alternatives)
+
+    def to_frame(self):
+        # Long date/variable/value/alternative frame, series after series
+        # and hours in order, without the hours a series has no value for
+        present = ~np.isnan(self.values)
+        counts = present.sum(axis=1)
+        return pd.DataFrame({
+            'date': np.broadcast_to(self.times, self.values.shape)[present],
+            'variable': np.repeat(self.variables, counts),
+            'value': self.values[present],
+            'alternative': np.repeat(self.alternatives, counts),
+        })
+
+
+def getESTMatrix(estDf, reservoirName, pct, window=None):
+    # One reservoir and pct of an EST output, either layout, as a
+    # ScenarioSeries labelled with the plot alternatives of getESTData
+    filter = _combine((ds.field('Reservoir') == reservoirName) & (ds.field('pct') == pct), window_filter(window))
+    if is_wide(estDf):
+        series = ScenarioSeries.from_wide(scenario_table(estDf, filter=filter))
+    else:
+        series = ScenarioSeries.from_long(scenario_table(estDf, filter=filter, columns=['date', 'variable', 'value']))
+    alternatives = estAlternatives(reservoirName)
+    series.alternatives = np.array([alternatives.get(variable) for variable in series.variables], dtype=object)
+    return series
+
+
+def getBaselineMatrix(baselineDf, reservoirName, window=None):
+    # The ID0, ID1 and ID3-PERFECT series of one reservoir of a baseline
+    # output, either layout, as one ScenarioSeries in that order
+    filter = _combine(
+        (ds.field('reservoirName') == reservoirName) & ds.field('alternative').isin(baselineAlternatives),
+        window_filter(window)
+    )
+    if is_wide(baselineDf):
+        groups = split_by(scenario_table(baselineDf, filter=filter), 'alternative')
+        parts = [ScenarioSeries.from_wide(groups[alternative], alternative)
+                 for alternative in baselineAlternatives if alternative in groups]
+        if not parts:
+            return ScenarioSeries(np.empty(0, 'datetime64[ns]'), np.empty((0, 0)), np.empty(0, object), np.empty(0, object))
+        return ScenarioSeries.stack(*parts)
+    series = ScenarioSeries.from_long(
+        scenario_table(baselineDf, filter=filter, columns=['date', 'variable', 'value', 'alternative']))
+    return series.select(alternative=baselineAlternatives)
+
+
+def getESTTable(estDf, reservoirName, pct, columns=None, window=None):
+    # getESTData as an Arrow table
+    if columns is not None:
+        columns = [name for name in columns if name in estDf.schema.names]
+
+    outputEST = scenario_table(estDf, filter = _combine(
+            (ds.field('Reservoir') == reservoirName) &
+            (ds.field('pct') == pct),
+            window_filter(window)
+    ), columns = columns)
+
+    if 'variable' in outputEST.column_names:
+        outputEST = outputEST.append_column('alternative', _mapped(outputEST['variable'], estAlternatives(reservoirName)))
+    return outputEST
+
+
+def getESTData(estDf, reservoirName, pct, columns=None, window=None):
+    # columns, e.g. ['date', 'variable', 'value', 'alternative'], and a
+    # [start, end] date window limit what is loaded; the alternative labels
+    # are not stored and are added whenever variable is loaded
+    return getESTTable(estDf, reservoirName, pct, columns=columns, window=window).to_pandas()
+
+baselineAlternatives = ["ID0", "ID1", "ID3-PERFECT"]
+
+
+def getBaselineTables(baselineDf, reservoirName, columns=None, window=None):
+    # getBaselineData as Arrow tables
+    loaded = None if columns is None else list(dict.fromkeys(list(columns) + ['alternative']))
+    output = scenario_table(baselineDf, filter = _combine(
+        (ds.field('reservoirName') == reservoirName) &
+        (ds.field('alternative').isin(baselineAlternatives)),
+        window_filter(window)
+    ), columns = loaded)
+    groups = split_by(output, 'alternative')
+    return tuple(
+        groups.get(alternative, output.slice(0, 0)).select(columns or output.column_names)
+        for alternative in baselineAlternatives
+    )
+
+
+def getBaselineData(baselineDf, reservoirName, columns=None, window=None):
+    # (ID0, ID1, ID3-PERFECT) frames from one read of the baseline output:
+    # the reservoir's rows are taken once and split by alternative in memory.
+    # columns and window as getESTData.
+    return tuple(
+        output.to_pandas()
+        for output in getBaselineTables(baselineDf, reservoirName, columns=columns, window=window)
+    )
+
+
+# Controlling durations of each DURATION code the model writes, e.g. 357 is
+# the 7-, 5- and 3-day windows at once
+DURATION_CODES = {
+    7: "07-Day",
+    50: "05-Day",
+    57: "07-Day, 05-Day",
+    300: "03-Day",
+    307: "07-Day, 03-Day",
+    350: "05-Day, 03-Day",
+    357: "07-Day, 05-Day, 03-Day",
+    2000: "02-Day",
+    2007: "07-Day, 02-Day",
+    2050: "05-Day, 02-Day",
+    2057: "07-Day, 05-Day, 02-Day",
+    2300: "03-Day, 02-Day",
+    2307: "07-Day, 03-Day, 02-Day",
+    2350: "05-Day, 03-Day, 02-Day",
+    2357: "07-Day, 05-Day, 03-Day, 02-Day",
+    10000: "01-Day",
+    10007: "07-Day, 01-Day",
+    10050: "05-Day, 01-Day",
+    10057: "07-Day, 05-Day, 01-Day",
+    10300: "03-Day, 01-Day",
+    10307: "07-Day, 03-Day, 01-Day",
+    10350: "05-Day, 03-Day, 01-Day",
+    10357: "07-Day, 05-Day, 03-Day, 01-Day",
+    12000: "02-Day, 01-Day",
+    12007: "07-Day, 02-Day, 01-Day",
+    12050: "05-Day, 02-Day, 01-Day",
+    12057: "07-Day, 05-Day, 02-Day, 01-Day",
+    12300: "03-Day, 02-Day, 01-Day",
+    12307: "07-Day, 03-Day, 02-Day, 01-Day",
+    12350: "05-Day, 03-Day, 02-Day, 01-Day",
+    12357: "07-Day, 05-Day, 03-Day, 02-Day, 01-Day",
+}
+
+
+def calculateDurations(outputEST):
+    durTable = outputEST.loc[outputEST.variable == 'DURATION', :].copy()
+    lookup = DURATION_CODES
+
+    # Map the 'value' column to the 'durations' column using the combined lookup dictionary
+    durTable['durations'] = durTable.loc[:,'value'].map(lambda x: lookup.get(x, '').split(', '))
+
+    # Drop rows with NaN values in the 'durations' column
+    durTable = durTable.loc[durTable.value>0, :]
+
+    # Explode the 'durations' column to repeat each row for each element in the list
+    durTable = durTable.explode('durations')
+
+    # Reset the index if needed
+    durTable = durTable.reset_index(drop=True)
+    durTable.loc[:,'value'] = pd.to_numeric(durTable.durations.str.split('-', expand=True)[0])
+
+    # Assuming durTable is your DataFrame and 'durations' is the column with the duration labels
+    output = pd.DataFrame()
+
+    for duration, sub_group in durTable.groupby('durations'):
+        # Create a date range with 6-hour frequency
+        idx = pd.date_range(sub_group.date.min(), sub_group.date.max(), freq="6h")
+
+        # Drop unnecessary columns and reindex with the new date range
+        sub_group = sub_group.drop(['durations', 'variable'], axis=1)
+        sub_group = sub_group.set_index('date').reindex(idx, fill_value=-99, tolerance='1h', method='nearest')
+        sub_group.index.name = 'date'
+        sub_group = sub_group.reset_index()
+
+        # Set value to 1 where it is not -99, otherwise set to 0
+        sub_group['value'] = sub_group['value'].apply(lambda x: 1 if x != -99 else 0)
+
+        # Create a group identifier for consecutive values
+        sub_group['val_grp'] = (sub_group['value'].astype(bool)).astype(int)
+        sub_group['val_grp'] = (sub_group['val_grp'].diff(1) != 0).astype('int').cumsum()
+        sub_group = sub_group[sub_group['value'] != 0]
+
+        # Create a DataFrame with the results
+        res = sub_group.groupby('val_grp').agg(
+            BeginDate=('date', 'first'),
+            EndDate=('date', 'last'),
+            Consecutive=('date', 'size')
+        ).reset_index(drop=True)
+        res['duration'] = duration
+
+        # Concatenate the results to the output DataFrame
+        output = pd.concat([output, res], ignore_index=True)
+    return output
+
+
+
+def duration_path(path):
+    # Companion duration table of one EST output: <stem>_durations.feather
+    # next to <stem>.feather/.parquet/.wide.*, or durations-0.feather in a
+    # --partitioned scenario directory
+    directory, name = os.path.split(path)
+    if name.startswith(('part-', 'wide-')):
+        return os.path.join(directory, 'durations-0.feather')
+    return os.path.join(directory, name.split('.')[0] + '_durations.feather')
+
+
+def getDurations(estDf, reservoirName, pct):
+    # The calculateDurations bars the converters wrote at ingest for this
+    # reservoir and pct, or None if estDf's outputs have no companion table
+    paths = [duration_path(fragment.path) for fragment in estDf.get_fragments()]
+    if not paths or not all(os.path.exists(path) for path in paths):
+        return None
+    durations = ds.dataset(paths, format='feather').to_table(
+        columns=['BeginDate', 'EndDate', 'Consecutive', 'duration'],
+        filter=(ds.field('Reservoir') == reservoirName) & (ds.field('pct') == pct)
+    )
+    return durations.to_pandas()
+
+
+def cachedDurations(estDf, scenario, reservoirName, pct, series):
+    # calculateDurations of the DURATION series of one reservoir and pct of
+    # estDf, from DURATION_CACHE. scenario is (dataset, year, config, scale);
+    # the key also carries scenario_key(estDf), a stat of each file, so a
+    # regenerated output is decoded again. series() returns the DURATION
+    # frame and is only called on a miss.
+    return DURATION_CACHE.get(
+        lambda: tuple(scenario) + (reservoirName, pct, scenario_key(estDf)),
+        lambda: calculateDurations(series())
+    )
+
+# Gauge flow thresholds (cfs) the app and renderers highlight in red
+FLOW_THRESHOLDS = {'MARYSVILLE': 180000, 'YUBA CITY': 180000, 'NICOLAUS': 320000, 'CONFLUENCE': 300000}
+
+# Summary variable for POOL-ELEV minus FIRO-TARGET (ft); its threshold is 0,
+# so hours_above is the time the pool spent above the FIRO target
+ENCROACHMENT = 'FIRO-ENCROACHMENT'
+
+# Summary table columns after the partition keys and an output's label
+# columns: one row per series (scenario, labels, variable). threshold,
+# hours_above and volume_above (acre-feet above the threshold) are null for
+# series without a threshold.
+SUMMARY_FIELDS = [
+    ('variable', pa.string()),
+    ('peak', pa.float64()),
+    ('peak_date', pa.timestamp('ns')),
+    ('threshold', pa.float64()),
+    ('hours_above', pa.float64()),
+    ('volume_above', pa.float64()),
+]
+
+# Every output's summary read as one table: EST rows carry Reservoir/pct
+# and baseline rows alternative/reservoirName, with the other pair null
+SUMMARY_SCHEMA = pa.schema(list(PARTITIONING.schema) + [
+    ('Reservoir', pa.string()),
+    ('pct', pa.int64()),
+    ('alternative', pa.string()),
+    ('reservoirName', pa.string()),
+] + SUMMARY_FIELDS)
+
+
+def summary_path(path):
+    # Summary table of one output: <stem>_summary.feather next to it, or
+    # summary-0.feather in a --partitioned scenario directory
+    directory, name = os.path.split(path)
+    if name.startswith(('part-', 'wide-')):
+        return os.path.join(directory, 'summary-0.feather')
+    return os.path.join(directory, name.split('.')[0] + '_summary.feather')
+
+
+def scenario_summaries(root='data'):
+    # Every summary table of the flat outputs in root, or of the --partitioned
+    # dataset rooted at root, as one frame without opening the time series,
+    # e.g. the peak Marysville flow of each scenario:
+    # summaries[summaries.variable == 'MARYSVILLE'].groupby(PARTITION_KEYS).peak.max()
+    # The files are read directly rather than as a pyarrow dataset, whose
+    # per-fragment scan setup dominates on a few hundred tiny files.
+    paths = sorted(
+        glob.glob(os.path.join(root, '*_summary.feather'))
+        + glob.glob(os.path.join(root, 'dataset=*', '**', 'summary-0.feather'), recursive=True)
+    )
+    if not paths:
+        return SUMMARY_SCHEMA.empty_table().to_pandas()
+    # EST and baseline tables have different label columns; promotion fills
+    # the missing pair with nulls
+    table = pa.concat_tables([pa.ipc.open_file(path).read_all() for path in paths], promote_options='default')
+    columns = set(table.column_names)
+    return pa.Table.from_arrays([
+        table[field.name] if field.name in columns else pa.nulls(len(table), field.type)
+        for field in SUMMARY_SCHEMA
+    ], schema=SUMMARY_SCHEMA).to_pandas()
+
+
+def is_wide(dataset):
+    # --layout wide outputs have one column per variable instead of variable/value
+    return 'variable' not in dataset.schema.names
+
+
+def _wide_series(table, labels, columns=None, alternatives=None):
+    # {variable: rows} of a --layout wide table in the long date/variable/value
+    # shape, with labels as constant columns and the missing hours dropped;
+    # alternatives maps variables to an alternative label column (null for
+    # the others). columns keeps the long columns asked for plus variable
+    # and alternative.
+    series = {}
+    for variable in table.column_names:
+        if variable in ('date', 'Reservoir', 'pct', 'alternative', 'reservoirName'):
+            continue
+        valid = pc.is_valid(table[variable])
+        values = table[variable].filter(valid)
+        if not len(values):
+            continue
+        rows = {'date': table['date'].filter(valid), 'variable': pa.repeat(pa.scalar(variable), len(values)),
+                'value': values}
+        if alternatives is not None:
+            labels = dict(labels, alternative=alternatives.get(variable))
+        for name, value in labels.items():
+            rows[name] = pa.repeat(pa.scalar(value, pa.string() if name != 'pct' else pa.int64()), len(values))
+        series[variable] = pa.table({
+            name: column for name, column in rows.items()
+            if columns is None or name in columns or name in ('variable', 'alternative')
+        })
+    return series
+
+
+def _with_variable(columns):
+    # The series are keyed by variable, so it is always loaded
+    return None if columns is None else list(dict.fromkeys(list(columns) + ['variable']))
+
+
+def getESTSeries(estDf, reservoirName, pct, columns=None, window=None):
+    # ScenarioFrame with the rows getESTData would give, from either layout,
+    # so callers index by variable instead of masking. columns names
+    # long-layout columns (variable and alternative are always kept) and
+    # window is a [start, end] date window, as getESTData.
+    if not is_wide(estDf):
+        return ScenarioFrame(getESTData(estDf, reservoirName, pct, columns=_with_variable(columns), window=window))
+
+    wide = scenario_table(estDf, filter = _combine(
+        (ds.field('Reservoir') == reservoirName) & (ds.field('pct') == pct), window_filter(window)
+    ))
+    series = _wide_series(wide, {'Reservoir': reservoirName, 'pct': pct}, columns, estAlternatives(reservoirName))
+    return ScenarioFrame.from_views({variable: table.to_pandas() for variable, table in series.items()})
+
+
+def getBaselineSeries(baselineDf, reservoirName, columns=None, window=None):
+    # (ScenarioFrame for ID0, ID1, ID3-PERFECT), as getESTSeries
+    if not is_wide(baselineDf):
+        return tuple(
+            ScenarioFrame(output)
+            for output in getBaselineData(baselineDf, reservoirName,
+                columns=_with_variable(columns and list(columns) + ['alternative']), window=window)
+        )
+
+    wide = scenario_table(baselineDf, filter = _combine(
+        ds.field('reservoirName') == reservoirName, window_filter(window)
+    ))
+    groups = split_by(wide, 'alternative')
+    return tuple(
+        ScenarioFrame.from_views({
+            variable: table.to_pandas()
+            for variable, table in _wide_series(groups.get(alternative, wide.slice(0, 0)),
+                                                {'alternative': alternative, 'reservoirName': reservoirName},
+                                                columns).items()
+        })
+        for alternative in baselineAlternatives
+    )
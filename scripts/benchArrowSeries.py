@@ -0,0 +1,147 @@
+import argparse
+import gc
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
+import pyarrow as pa
+from pyarrow import dataset as ds
+from scenarioData import (
+    ScenarioSeries, baselineAlternatives, estAlternatives, getBaselineData, getBaselineMatrix, getESTData, getESTMatrix,
+    scenario_catalog, scenario_table
+)
+
+
+# CPU time and peak memory of one app.py rerun's data preparation (both
+# reservoirs of a scenario, from the table cache as on every rerun after
+# the first) with the previous pandas path, which converted each filtered
+# table to pandas and then masked and relabelled it with .loc, and the
+# series path app.py uses now, which holds each reservoir as a
+# ScenarioSeries (one time axis, a series x hour value array and a label
+# per series) and builds the long frames the charts take from it. Peak
+# memory is measured in separate reruns from the CPU time: the peak of a
+# fresh Arrow memory pool the rerun allocates from, and the tracemalloc
+# peak of the numpy and Python allocations (pandas frames) made alongside
+# it. The model size compares what a loaded reservoir holds: the long
+# frames of getESTData and getBaselineData against the ScenarioSeries of
+# getESTMatrix and getBaselineMatrix.
+
+chartColumns = ['date', 'variable', 'value', 'alternative']
+gauges = ["MARYSVILLE", "YUBA CITY", "NICOLAUS", "CONFLUENCE"]
+
+
+def pandas_frames(estDf, baselineDf, reservoirName, pct):
+    # The chart frames as app.py built them before the series path
+    outputEST = scenario_table(estDf, filter=(ds.field('Reservoir') == reservoirName) & (ds.field('pct') == pct),
+                               columns=['date', 'variable', 'value']).to_pandas()
+    for variable, alternative in estAlternatives(reservoirName).items():
+        outputEST.loc[outputEST.variable == variable, 'alternative'] = alternative
+    estSeries = dict(tuple(outputEST.groupby('variable', sort=False)))
+
+    baseline = scenario_table(baselineDf, filter=(ds.field('reservoirName') == reservoirName) &
+                              ds.field('alternative').isin(baselineAlternatives), columns=chartColumns)
+    perfect = [
+        dict(tuple(baseline.filter(ds.field('alternative') == alternative).to_pandas().groupby('variable', sort=False)))
+        for alternative in baselineAlternatives
+    ]
+
+    elevDf = pd.concat([estSeries["POOL-ELEV"], estSeries["FIRO-TARGET"]] + [series["POOL-ELEV"] for series in perfect])
+    flowDf = pd.concat([estSeries[f'{reservoirName}-OUT'], estSeries[f'{reservoirName}-IN']]
+                       + [series[f'{reservoirName}-OUT'] for series in perfect])
+    flowDf.loc[flowDf.alternative == f'{reservoirName}-OUT', 'alternative'] = 'ID3-IMPERFECT'
+    flowDf.loc[flowDf.alternative == f'{reservoirName}-IN', 'alternative'] = 'INFLOW'
+    return [elevDf, flowDf, estSeries['DURATION']] + [estSeries[name] for name in gauges]
+
+
+def series_frames(estDf, baselineDf, reservoirName, pct):
+    # The chart frames as app.py builds them now
+    estSeries = getESTMatrix(estDf, reservoirName, pct)
+    perfect = getBaselineMatrix(baselineDf, reservoirName)
+    elevDf = ScenarioSeries.stack(estSeries.select(variable=["POOL-ELEV", "FIRO-TARGET"]),
+                                  perfect.select(variable="POOL-ELEV")).to_frame()
+    flowDf = ScenarioSeries.stack(
+        estSeries.select(variable=[f'{reservoirName}-OUT', f'{reservoirName}-IN']),
+        perfect.select(variable=f'{reservoirName}-OUT'),
+    ).relabel({
+        f'{reservoirName}-OUT': 'ID3-IMPERFECT',
+        f'{reservoirName}-IN': 'INFLOW',
+    }).to_frame()
+    return [elevDf, flowDf] + [estSeries.select(variable=name).to_frame() for name in ['DURATION'] + gauges]
+
+
+def model_size(estDf, baselineDf, reservoirName, pct):
+    # (long frames, ScenarioSeries) bytes of one reservoir
+    frames = [getESTData(estDf, reservoirName, pct, columns=chartColumns)]
+    frames += getBaselineData(baselineDf, reservoirName, columns=chartColumns)
+    series = [getESTMatrix(estDf, reservoirName, pct), getBaselineMatrix(baselineDf, reservoirName)]
+    return (sum(frame.memory_usage(deep=True).sum() for frame in frames),
+            sum(model.nbytes for model in series))
+
+
+def rerun(frames, estDf, baselineDf, pct):
+    gc.collect()
+    return [frames(estDf, baselineDf, reservoirName, pct) for reservoirName in ["ORO", "NBB"]]
+
+
+def cpu_time(frames, estDf, baselineDf, pct):
+    start = time.process_time()
+    rerun(frames, estDf, baselineDf, pct)
+    return time.process_time() - start
+
+
+def peak_memory(frames, estDf, baselineDf, pct):
+    # (Arrow pool peak, numpy/Python peak) in bytes
+    base = pa.default_memory_pool()
+    pool = pa.proxy_memory_pool(base)
+    pa.set_memory_pool(pool)
+    tracemalloc.start()
+    try:
+        rerun(frames, estDf, baselineDf, pct)
+        return pool.max_memory(), tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        pa.set_memory_pool(base)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Per-rerun CPU and peak memory of the pandas and series chart data paths')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--dataset', default='FVA_config')
+    parser.add_argument('--limit', type=int, default=4, help='scenarios to rerun')
+    parser.add_argument('--reruns', type=int, default=20, help='reruns per scenario and path')
+    parser.add_argument('--pct', type=int, default=75)
+    args = parser.parse_args()
+
+    catalog = scenario_catalog(args.data)
+    scenarios = [key for key in catalog.scenarios() if key[0] == args.dataset][:args.limit]
+
+    paths = [('pandas', pandas_frames), ('series', series_frames)]
+    results = {name: ([], [], []) for name, _ in paths}
+    frameBytes, seriesBytes = 0, 0
+    for key in scenarios:
+        estDf, baselineDf = catalog.open(*key), catalog.open('baseline', *key[1:])
+        for reservoirName in ["ORO", "NBB"]:
+            sizes = model_size(estDf, baselineDf, reservoirName, args.pct)
+            frameBytes += sizes[0]
+            seriesBytes += sizes[1]
+        for name, frames in paths:
+            # The first load fills the table cache
+            rerun(frames, estDf, baselineDf, args.pct)
+            results[name][0].extend(cpu_time(frames, estDf, baselineDf, args.pct) for _ in range(args.reruns))
+            arrowPeak, pythonPeak = peak_memory(frames, estDf, baselineDf, args.pct)
+            results[name][1].append(arrowPeak)
+            results[name][2].append(pythonPeak)
+
+    print(f"{len(scenarios)} {args.dataset} scenarios, {args.reruns} reruns each")
+    print(f"{'path':<8}{'CPU ms/rerun':>14}{'Arrow peak MB':>15}{'numpy/Python peak MB':>22}")
+    for name, (cpu, arrowPeak, pythonPeak) in results.items():
+        print(f"{name:<8}{1000 * statistics.median(cpu):>14.1f}{statistics.median(arrowPeak) / 1e6:>15.1f}"
+              f"{statistics.median(pythonPeak) / 1e6:>22.1f}")
+    count = 2 * len(scenarios)
+    print(f"model size per reservoir: long frames {frameBytes / count / 1e6:.2f} MB, "
+          f"ScenarioSeries {seriesBytes / count / 1e6:.2f} MB")
@@ -0,0 +1,80 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyarrow import dataset as ds
+from scenarioData import TABLE_CACHE, baselineAlternatives, getBaselineData, read_table, scenario_file
+
+
+# Baseline reads of the three consumers of getBaselineData/getBaselineSeries
+# with the previous loader (one filtered scan per alternative, three per
+# reservoir) and the current one (one read per baseline file, split in
+# memory and kept in TABLE_CACHE). A feather scan reads the whole file, so
+# the MB column is scans x file size.
+reservoirs = ["ORO", "NBB"]
+
+
+def three_scans(baselineDf, reservoirName):
+    # getBaselineData before the single-scan loader
+    return tuple(
+        read_table(baselineDf, filter = (
+            (ds.field('reservoirName') == reservoirName) &
+            (ds.field('alternative') == alternative)
+        )).to_pandas()
+        for alternative in baselineAlternatives
+    )
+
+
+def consumer_calls(files, reruns):
+    # (file, reservoir) loads in the order each consumer makes them: app.py
+    # loads both reservoirs on every rerun, and a scenario is rerun once per
+    # widget change (pct, ...) before the next is picked; the plot scripts
+    # load both reservoirs once per scale factor file
+    browse = [(path, reservoirName) for path in files for _ in range(1 + reruns) for reservoirName in reservoirs]
+    plots = [(path, reservoirName) for path in files for reservoirName in reservoirs]
+    return {'app.py': browse, 'manualPlot_altair_v5.py': plots, 'compare_releases_...py': plots}
+
+
+def run(calls, loader, scans):
+    # Wall time, scans and bytes read; scans(load) runs one load and
+    # returns how many scans it made
+    elapsed, count, read = 0.0, 0, 0
+    for path, reservoirName in calls:
+        start = time.perf_counter()
+        made = scans(lambda: loader(scenario_file(path[:-len('.feather')]), reservoirName))
+        elapsed += time.perf_counter() - start
+        count += made
+        read += made * os.path.getsize(path)
+    return 1000 * elapsed, count, read
+
+
+def fixed_scans(load):
+    load()
+    return len(baselineAlternatives)
+
+
+def cache_misses(load):
+    misses = TABLE_CACHE.misses
+    load()
+    return TABLE_CACHE.misses - misses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare the three-scan and single-scan baseline loaders')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--limit', type=int, default=10, help='baseline files each consumer loads')
+    parser.add_argument('--reruns', type=int, default=3, help='app.py reruns per scenario')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.data, '*_baseline.feather')))[:args.limit]
+
+    print(f"{'consumer':<26}{'loads':>6}{'scans':>12}{'MB read':>16}{'ms':>16}")
+    for consumer, calls in consumer_calls(files, args.reruns).items():
+        oldTime, oldScans, oldBytes = run(calls, three_scans, fixed_scans)
+        TABLE_CACHE.clear()
+        newTime, newScans, newBytes = run(calls, getBaselineData, cache_misses)
+        print(f"{consumer:<26}{len(calls):>6}{oldScans:>6} ->{newScans:>4}"
+              f"{oldBytes / 1e6:>8.1f} ->{newBytes / 1e6:>5.1f}{oldTime:>8.0f} ->{newTime:>5.0f}")
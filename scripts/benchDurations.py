@@ -0,0 +1,64 @@
+from dssIngest import duration_bars
+from exportWide import long_blocks
+from partitionFeather import scenario_partition
+from scenarioData import calculateDurations
+import pandas as pd
+import pyarrow.feather
+import argparse
+import glob
+import os
+import time
+
+
+# Checks the ingest's duration decoder (dssIngest.duration_bars) against
+# calculateDurations, the reference it replaces, on every block of the EST
+# outputs in data/, and times both. Exits non-zero on the first block
+# whose bars differ.
+
+durationColumns = ['BeginDate', 'EndDate', 'Consecutive', 'duration']
+
+
+def reference_bars(times, values):
+    keep = ~pd.isna(values)
+    durations = calculateDurations(pd.DataFrame({'date': times[keep], 'variable': 'DURATION', 'value': values[keep]}))
+    if not len(durations):
+        return pd.DataFrame({name: [] for name in durationColumns})
+    return durations[durationColumns]
+
+
+def decoded_bars(times, values):
+    return pd.DataFrame(dict(zip(durationColumns, duration_bars(times, values))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check and time duration_bars against calculateDurations')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--limit', type=int, default=None, help='only use the first N EST files')
+    args = parser.parse_args()
+
+    files = []
+    for path in sorted(glob.glob(os.path.join(args.data, '*.feather'))):
+        partition = scenario_partition(os.path.basename(path))
+        if partition is not None and partition[0]['dataset'] != 'baseline':
+            files.append((path, partition[1]))
+    files = files[:args.limit]
+
+    blocks, bars, referenceTime, decodedTime = 0, 0, 0.0, 0.0
+    for path, labelFields in files:
+        table = pyarrow.feather.read_table(path, columns=['date', 'variable', 'value'] + list(labelFields))
+        for series, labels in long_blocks(table, labelFields):
+            if 'DURATION' not in series:
+                continue
+            times, values = series['DURATION']
+            start = time.perf_counter()
+            expected = reference_bars(times, values)
+            referenceTime += time.perf_counter() - start
+            start = time.perf_counter()
+            decoded = decoded_bars(times, values)
+            decodedTime += time.perf_counter() - start
+            pd.testing.assert_frame_equal(decoded, expected, check_dtype=False, obj=f"{path} {labels}")
+            blocks += 1
+            bars += len(decoded)
+
+    print(f"{len(files)} files, {blocks} blocks, {bars} bars identical")
+    print(f"calculateDurations {referenceTime:.2f} s, duration_bars {decodedTime:.2f} s")
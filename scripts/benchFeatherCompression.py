@@ -0,0 +1,64 @@
+from dssIngest import feather_compression
+from partitionFeather import scenario_partition
+from pyarrow import dataset as ds
+import pyarrow.feather
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+
+# Filters the app and batch renderers push into to_table() for each file kind
+def typical_filter(path):
+    if path.endswith('_baseline.feather'):
+        return ds.field('reservoirName') == 'ORO'
+    return (ds.field('Reservoir') == 'ORO') & (ds.field('pct') == 75)
+
+
+def bench_codec(tables, outDir, compression, compression_level):
+    size = 0
+    writeTime = 0.0
+    readTime = 0.0
+    for name, table in tables.items():
+        path = os.path.join(outDir, name)
+
+        start = time.perf_counter()
+        pyarrow.feather.write_feather(table, path, **feather_compression(compression, compression_level))
+        writeTime += time.perf_counter() - start
+        size += os.path.getsize(path)
+
+        start = time.perf_counter()
+        ds.dataset(path, format='feather').to_table(filter=typical_filter(path))
+        readTime += time.perf_counter() - start
+    return size, writeTime, readTime
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare feather codecs on the data/ corpus')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--limit', type=int, default=None, help='only use the first N files')
+    parser.add_argument('--zstd-levels', type=int, nargs='*', default=[1, 3, 9])
+    args = parser.parse_args()
+
+    # Scenario outputs only: the companion duration and summary tables and
+    # the catalog (_catalog.feather) lack the Reservoir/pct fields
+    files = [
+        path for path in sorted(glob.glob(os.path.join(args.data, '*.feather')))
+        if not os.path.basename(path).startswith('_') and scenario_partition(os.path.basename(path)) is not None
+    ][:args.limit]
+    tables = {os.path.basename(path): pyarrow.feather.read_table(path) for path in files}
+    rawBytes = sum(table.nbytes for table in tables.values())
+    print(f"{len(tables)} files, {rawBytes / 1e6:.1f} MB in memory")
+
+    codecs = [('none', None), ('lz4', None)] + [('zstd', level) for level in args.zstd_levels]
+    outDir = tempfile.mkdtemp()
+    try:
+        print(f"{'codec':<10}{'size MB':>10}{'ratio':>8}{'write s':>10}{'read s':>10}")
+        for compression, compression_level in codecs:
+            size, writeTime, readTime = bench_codec(tables, outDir, compression, compression_level)
+            label = compression if compression_level is None else f"{compression}-{compression_level}"
+            print(f"{label:<10}{size / 1e6:>10.1f}{rawBytes / size:>8.1f}{writeTime:>10.2f}{readTime:>10.2f}")
+    finally:
+        shutil.rmtree(outDir)
@@ -0,0 +1,76 @@
+from dssIngest import add_ingest_arguments, collect_paths, write_options
+from ingest import run_ingest, scenario_inputs, scenario_keys
+from ingestSpec import DATASETS
+from syntheticDss import write_archive
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+
+# Times the ingest of some datasets' scenarios (or their first --scenarios)
+# offline: every source DSS file is replaced by a syntheticDss archive of
+# the pathnames the scenarios read, then they run through run_ingest exactly
+# as ingest.py would, with the synthetic reader.
+
+
+def synthetic_sources(keys):
+    # Writes one archive per source file into the working directory and
+    # returns the number of distinct series they hold
+    requests = {}
+    for key in keys:
+        inputs = scenario_inputs(*key)
+        requests.setdefault(inputs['source'], []).extend(
+            (path, inputs['window']) for path in collect_paths(inputs['paths'])
+        )
+    series = 0
+    for source, sourceRequests in requests.items():
+        write_archive(source, sourceRequests)
+        series += len({path.upper() for path, window in sourceRequests})
+    return series
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time the ingest against synthetic DSS files')
+    parser.add_argument('--dataset', action='append', choices=list(DATASETS),
+        help='dataset to ingest, repeatable (default: FVA_config)')
+    parser.add_argument('--scenarios', type=int, default=None, help='only run the first N scenarios of the datasets')
+    parser.add_argument('--generate', action='store_true',
+        help='generate series on every read instead of replaying them from .npz archives')
+    parser.add_argument('--out', default=None, help='keep the outputs in this directory (default: a temporary one)')
+    add_ingest_arguments(parser)
+    args = parser.parse_args()
+
+    datasets = args.dataset or ['FVA_config']
+    keys = scenario_keys(datasets)[:args.scenarios]
+
+    workDir = os.path.abspath(args.out) if args.out else tempfile.mkdtemp()
+    os.makedirs(workDir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(workDir)
+    try:
+        start = time.perf_counter()
+        if args.generate:
+            series = len({path.upper() for key in keys for path in collect_paths(scenario_inputs(*key)['paths'])})
+        else:
+            series = synthetic_sources(keys)
+        setupTime = time.perf_counter() - start
+
+        start = time.perf_counter()
+        timings = run_ingest(datasets, workers=args.workers, options=write_options(args), reader='synthetic',
+            limit=args.scenarios, validate=not args.generate)
+        wallTime = time.perf_counter() - start
+
+        outputs = [path for path in glob.glob('**', recursive=True) if path.endswith(('.feather', '.parquet'))]
+        size = sum(os.path.getsize(path) for path in outputs)
+        passTime = sum(elapsed for _, elapsed in timings)
+        print(f"{', '.join(datasets)}: {len(keys)} scenarios in {len(timings)} passes, {series:,} series, "
+              f"{len(outputs)} files, {size / 1e6:.1f} MB")
+        print(f"setup {setupTime:.1f} s, ingest {wallTime:.2f} s wall on {max(args.workers, 1)} worker(s), "
+              f"{1000 * passTime / max(len(keys), 1):.0f} ms/scenario, {series / wallTime:,.0f} series/s")
+    finally:
+        os.chdir(cwd)
+        if not args.out:
+            shutil.rmtree(workDir)
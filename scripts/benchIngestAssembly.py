@@ -0,0 +1,75 @@
+from dssIngest import LongFrameBuilder
+import pandas as pd
+import numpy as np
+import argparse
+import time
+
+
+# Synthetic stand-in for one Alt3 output file: every pct x reservoir block
+# holds the nine hourly series process_paths reads for that reservoir.
+variablesLookup = {
+    "ORO": ["POOL-ELEV", "FIRO-TARGET", "ORO-OUT", "ORO-IN", "CONFLUENCE", "NICOLAUS", "MARYSVILLE", "YUBA CITY", "DURATION"],
+    "NBB": ["POOL-ELEV", "FIRO-TARGET", "NBB-OUT", "NBB-IN", "CONFLUENCE", "NICOLAUS", "MARYSVILLE", "YUBA CITY", "DURATION"],
+}
+
+
+def synthetic_blocks(pct_options, hours):
+    rng = np.random.default_rng(0)
+    times = pd.date_range('1986-02-04 04:00', periods=hours, freq='h')
+    blocks = []
+    for pct in pct_options:
+        for reservoirName, variables in variablesLookup.items():
+            series = {variable: (times, rng.random(hours) * 1000) for variable in variables}
+            blocks.append((reservoirName, pct, series))
+    return blocks
+
+
+def legacy_assemble(blocks):
+    # The process_paths + pd.concat path the converters used before LongFrameBuilder
+    output = pd.DataFrame()
+    for reservoirName, pct, series in blocks:
+        output_df = pd.DataFrame()
+        for variable, (times, values) in series.items():
+            df = pd.DataFrame(index = times, data = {variable: values})
+            output_df = pd.concat([output_df, df], axis=1)
+        output_df = output_df.stack().reset_index()
+        output_df.columns = ['date', 'variable', 'value']
+        output_df.loc[:,'Reservoir'] = reservoirName
+        output_df.loc[:,'pct'] = pct
+        output = pd.concat([output, output_df])
+    return output
+
+
+def builder_assemble(blocks):
+    builder = LongFrameBuilder()
+    for reservoirName, pct, series in blocks:
+        builder.add_block(series, Reservoir=reservoirName, pct=pct)
+    return builder.to_frame()
+
+
+def best_of(func, blocks, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func(blocks)
+        timings.append(time.perf_counter() - start)
+    return min(timings), output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare long-format assembly strategies on a synthetic Alt3 workload')
+    parser.add_argument('--pcts', type=int, default=19)
+    parser.add_argument('--hours', type=int, default=529)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    pct_options = list(range(5, 5 * args.pcts + 1, 5))
+    blocks = synthetic_blocks(pct_options, args.hours)
+
+    legacyTime, legacy = best_of(legacy_assemble, blocks, args.repeat)
+    builderTime, built = best_of(builder_assemble, blocks, args.repeat)
+
+    pd.testing.assert_frame_equal(legacy, built, check_dtype=False, check_index_type=False)
+    print(f"{len(blocks)} blocks x 9 variables x {args.hours} hours -> {len(built):,} rows")
+    print(f"pd.concat + stack : {legacyTime * 1000:8.1f} ms")
+    print(f"LongFrameBuilder  : {builderTime * 1000:8.1f} ms  ({legacyTime / builderTime:.1f}x)")
@@ -0,0 +1,74 @@
+from exportParquet import export_file
+from pyarrow import dataset as ds
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+
+# The filters getESTData and getBaselineData push into to_table()
+estFilters = [
+    (ds.field('Reservoir') == reservoirName) & (ds.field('pct') == pct)
+    for reservoirName in ["ORO", "NBB"] for pct in [5, 50, 75, 95]
+]
+baselineFilters = [
+    (ds.field('reservoirName') == reservoirName) & (ds.field('alternative') == alternative)
+    for reservoirName in ["ORO", "NBB"] for alternative in ["ID0", "ID1", "ID3-PERFECT"]
+]
+
+
+def bench_filters(dataset, filters, repeat):
+    start = time.perf_counter()
+    rows = 0
+    for _ in range(repeat):
+        for filter in filters:
+            rows += dataset.to_table(filter=filter).num_rows
+    return (time.perf_counter() - start) / (repeat * len(filters)), rows
+
+
+def row_groups_read(dataset, filters):
+    # Row groups left after statistics pruning, averaged over the filters
+    fragment = next(dataset.get_fragments())
+    total = fragment.num_row_groups
+    kept = [len(fragment.split_by_row_group(filter=filter)) for filter in filters]
+    return sum(kept) / len(kept), total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare filtered feather scans with sorted Parquet row-group pruning')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--limit', type=int, default=10, help='files of each kind to measure')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    kinds = {
+        'EST': (sorted(glob.glob(os.path.join(args.data, '*_Alt3.feather')))[:args.limit], estFilters),
+        'baseline': (sorted(glob.glob(os.path.join(args.data, '*_baseline.feather')))[:args.limit], baselineFilters),
+    }
+
+    outDir = tempfile.mkdtemp()
+    try:
+        print(f"{'kind':<10}{'format':<9}{'ms/filter':>10}{'size MB':>9}{'groups read':>13}")
+        for kind, (files, filters) in kinds.items():
+            results = {'feather': [0.0, 0, 0], 'parquet': [0.0, 0, 0]}
+            groups = []
+            for path in files:
+                parquetPath = export_file(path, outDir)
+                for format, filePath in [('feather', path), ('parquet', parquetPath)]:
+                    dataset = ds.dataset(filePath, format=format)
+                    elapsed, rows = bench_filters(dataset, filters, args.repeat)
+                    results[format][0] += elapsed
+                    results[format][1] += rows
+                    results[format][2] += os.path.getsize(filePath)
+                groups.append(row_groups_read(ds.dataset(parquetPath, format='parquet'), filters))
+
+            assert results['feather'][1] == results['parquet'][1], 'filtered row counts differ'
+            kept = sum(k for k, _ in groups) / len(groups)
+            total = sum(t for _, t in groups) / len(groups)
+            for format, (elapsed, rows, size) in results.items():
+                groupsRead = f"{kept:.1f} of {total:.0f}" if format == 'parquet' else 'all'
+                print(f"{kind:<10}{format:<9}{1000 * elapsed / len(files):>10.2f}{size / 1e6:>9.1f}{groupsRead:>13}")
+    finally:
+        shutil.rmtree(outDir)
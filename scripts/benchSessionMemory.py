@@ -0,0 +1,109 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pyarrow.feather
+
+
+# Resident memory of concurrent app sessions with and without memory-mapped
+# reads (scenarioData.MEMORY_MAP). Each session is a process that loads the
+# same scenarios the way app.py does, both reservoirs of an EST and a
+# baseline output each, and holds them in its table cache; the memory of
+# every session is sampled while all of them are alive. RSS counts shared
+# page-cache pages in full in every session, PSS splits them between the
+# sessions mapping them, USS is what a session alone holds. Linux only
+# (/proc/<pid>/smaps_rollup).
+
+chartColumns = ['date', 'variable', 'value', 'alternative']
+
+
+def memory(pid='self'):
+    # {'rss', 'pss', 'uss'} in bytes
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'uss': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def session(stems, memoryMap, ready, release):
+    os.environ['SCENARIO_MMAP'] = '1' if memoryMap else '0'
+    from scenarioData import getBaselineSeries, getESTSeries, scenario_file
+    before = memory()
+    held = []
+    for estStem, baselineStem in stems:
+        for reservoirName in ["ORO", "NBB"]:
+            held.append(getESTSeries(scenario_file(estStem), reservoirName, 75, columns=chartColumns))
+            held.append(getBaselineSeries(scenario_file(baselineStem), reservoirName, columns=chartColumns))
+    ready.put((os.getpid(), before))
+    release.wait()
+
+
+def run_sessions(stems, sessions, memoryMap):
+    # Per-session (memory before loading, memory with every session loaded)
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    release = context.Event()
+    processes = [context.Process(target=session, args=(stems, memoryMap, ready, release)) for _ in range(sessions)]
+    for process in processes:
+        process.start()
+    loaded = [ready.get() for _ in processes]
+    samples = [(before, memory(pid)) for pid, before in loaded]
+    release.set()
+    for process in processes:
+        process.join()
+    return samples
+
+
+def uncompressed_copies(files, outDir):
+    # The scenario files as --compression none writes them
+    for path in files:
+        pyarrow.feather.write_feather(pyarrow.feather.read_table(path), os.path.join(outDir, os.path.basename(path)),
+                                      compression='uncompressed')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Resident memory per session with and without memory-mapped reads')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--limit', type=int, default=4, help='scenarios (EST + baseline output) each session loads')
+    parser.add_argument('--sessions', type=int, default=4)
+    parser.add_argument('--compressed', action='store_true',
+        help='read the files as they are instead of uncompressed copies')
+    args = parser.parse_args()
+
+    estFiles = sorted(glob.glob(os.path.join(args.data, '*_FVA_config_Alt3.feather')))[:args.limit]
+    pairs = [(path, path.replace('_FVA_config_Alt3', '_baseline')) for path in estFiles]
+
+    outDir = tempfile.mkdtemp()
+    try:
+        if args.compressed:
+            dataDir = args.data
+        else:
+            uncompressed_copies([path for pair in pairs for path in pair], outDir)
+            dataDir = outDir
+        stems = [
+            tuple(os.path.join(dataDir, os.path.basename(path))[:-len('.feather')] for path in pair)
+            for pair in pairs
+        ]
+        size = sum(os.path.getsize(stem + '.feather') for pair in stems for stem in pair)
+        print(f"{args.sessions} sessions, {len(stems)} scenarios each, {size / 1e6:.1f} MB of "
+              f"{'compressed' if args.compressed else 'uncompressed'} files")
+        print(f"{'reads':<8}{'RSS MB':>9}{'PSS MB':>9}{'USS MB':>9}{'loaded USS MB':>15}")
+        for memoryMap in [False, True]:
+            samples = run_sessions(stems, args.sessions, memoryMap)
+            mean = {key: sum(after[key] for _, after in samples) / len(samples) / 1e6 for key in ['rss', 'pss', 'uss']}
+            growth = sum(after['uss'] - before['uss'] for before, after in samples) / len(samples) / 1e6
+            print(f"{'mmap' if memoryMap else 'read':<8}{mean['rss']:>9.1f}{mean['pss']:>9.1f}{mean['uss']:>9.1f}{growth:>15.1f}")
+    finally:
+        shutil.rmtree(outDir)
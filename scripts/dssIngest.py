@@ -0,0 +1,1064 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather
+import pyarrow.ipc
+import pyarrow.parquet
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import sys
+import time
+
+# The converters run as scripts/<name>.py; put the repository root on the
+# path so they share the app's duration codes, partition layout and summary
+# schema in scenarioData
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scenarioData import (
+    DURATION_CODES, ENCROACHMENT, FLOW_THRESHOLDS, PARTITION_KEYS, PARTITIONING, SUMMARY_FIELDS, duration_path,
+    summary_path
+)
+
+
+# Every output's date column is Pacific Standard Time all year (UTC-8, no
+# daylight saving): the EST event windows are PST and the baseline DSS
+# times are shifted from UTC on read. The zone is recorded in each output's
+# schema metadata under 'date_timezone'; the column itself stays naive.
+OUTPUT_TIME_ZONE = 'Etc/GMT+8'
+TIME_METADATA = {'date_timezone': OUTPUT_TIME_ZONE}
+PST_OFFSET = pd.Timedelta(hours=-8)
+
+
+def readDssSeries(fid, path, window, convertTime=False):
+
+    ts = fid.get(path, startdatetime=window[0], enddatetime=window[1])
+    values = ts.values
+
+    # One conversion of the time axis to datetime64, then the UTC -> PST
+    # shift is a single array operation
+    times = pd.DatetimeIndex(ts.times)
+    if convertTime:
+        times = times + PST_OFFSET
+
+    return times, np.asarray(values)
+
+
+def getDssData(fid, path, variable, window, convertTime=False):
+
+    times, values = readDssSeries(fid, path, window, convertTime)
+    df = pd.DataFrame(index = times, data = {variable: values})
+
+    return df
+
+
+def _catalog_key(path):
+    # Catalog entries carry a D-part per data block; requests usually leave it blank
+    parts = path.upper().split('/')
+    if len(parts) == 8:
+        parts[4] = ''
+    return '/'.join(parts)
+
+
+def _d_part(path):
+    parts = path.upper().split('/')
+    return parts[4] if len(parts) == 8 else ''
+
+
+def _block_months(window):
+    # The monthly blocks (D-parts such as 01DEC1996) hourly records of the
+    # window are stored in
+    months = pd.period_range(pd.Timestamp(window[0]), pd.Timestamp(window[1]), freq='M')
+    return [month.start_time.strftime('%d%b%Y').upper() for month in months]
+
+
+# Problems listed per file before the error is raised
+MAX_REPORTED = 20
+
+
+class CatalogError(ValueError):
+    # Raised before any series is read when requested pathnames do not
+    # resolve against the DSS catalogs; problems maps file -> messages
+
+    def __init__(self, problems):
+        self.problems = problems
+        lines = []
+        for dss_file, messages in problems.items():
+            lines.append(f"{dss_file}: {len(messages)} problem(s)")
+            lines += [f"  {message}" for message in messages[:MAX_REPORTED]]
+            if len(messages) > MAX_REPORTED:
+                lines.append(f"  ... and {len(messages) - MAX_REPORTED} more")
+        super().__init__('\n'.join(lines))
+
+
+def check_catalog(catalog, requests):
+    # Resolves (pathname, window) requests against one file's catalog (see
+    # DssSession.catalog) and returns a message per missing or duplicate
+    # record: pathnames with no record, named D-part blocks the file does
+    # not hold, hourly windows reaching months with no block, and records
+    # the catalog lists more than once
+    problems = []
+    checked = set()
+    months = {}
+    for path, window in requests:
+        key = (path.upper(), tuple(window))
+        if key in checked:
+            continue
+        checked.add(key)
+
+        records = catalog.get(_catalog_key(path))
+        if not records:
+            problems.append(f"missing {path}")
+            continue
+
+        blocks = [_d_part(record) for record in records]
+        for block in sorted({block for block in blocks if blocks.count(block) > 1}):
+            problems.append(f"duplicate {path} block {block} is listed {blocks.count(block)} times")
+        if _d_part(path) and _d_part(path) not in blocks:
+            problems.append(f"missing {path}: the file holds no {_d_part(path)} block")
+        elif 'HOUR' in path.upper().split('/')[5]:
+            if tuple(window) not in months:
+                months[tuple(window)] = _block_months(window)
+            absent = [month for month in months[tuple(window)] if month not in blocks]
+            if absent:
+                problems.append(f"missing {path}: no {', '.join(absent)} block for window {window[0]} - {window[1]}")
+    return problems
+
+
+def open_hecdss(dss_file):
+    # Imported here so the assembly helpers work without hecdss installed
+    from hecdss import HecDss
+    return HecDss(dss_file)
+
+
+def open_synthetic(dss_file):
+    # Offline stand-in generating (or replaying from <dss_file>.npz) series
+    # for the converters' pathnames; see syntheticDss
+    from syntheticDss import SyntheticDss
+    return SyntheticDss(dss_file)
+
+
+# A reader opens one DSS file and returns a handle with the hecdss.HecDss
+# interface the session uses: get(path, startdatetime=, enddatetime=)
+# returning an object with .times and .values, close(), and optionally
+# get_catalog() with .uncondensed_paths
+DSS_READERS = {'hecdss': open_hecdss, 'synthetic': open_synthetic}
+
+
+class DssSession:
+    # Keeps one DSS handle per file open for the whole conversion run and
+    # holds batch-read series until the writers have consumed them.
+    # reader is a DSS_READERS name or any callable with the same signature.
+
+    def __init__(self, reader='hecdss'):
+        self.reader = reader
+        self._open = DSS_READERS[reader] if isinstance(reader, str) else reader
+        self._handles = {}
+        self._catalogs = {}
+        self._catalogOrder = {}
+        self._series = {}
+
+    def open(self, dss_file):
+        if dss_file not in self._handles:
+            self._handles[dss_file] = self._open(dss_file)
+        return self._handles[dss_file]
+
+    def catalog(self, dss_file):
+        # Condensed pathname (blank D-part) -> the file's records of it in
+        # catalog order, or None when the reader has no catalog
+        if dss_file not in self._catalogs:
+            try:
+                paths = self.open(dss_file).get_catalog().uncondensed_paths
+            except AttributeError:
+                paths = None
+            catalog = None
+            if paths is not None:
+                catalog = {}
+                for path in paths:
+                    catalog.setdefault(_catalog_key(path), []).append(path.upper())
+            self._catalogs[dss_file] = catalog
+        return self._catalogs[dss_file]
+
+    def catalog_order(self, dss_file):
+        if dss_file not in self._catalogOrder:
+            catalog = self.catalog(dss_file) or {}
+            self._catalogOrder[dss_file] = {key: i for i, key in enumerate(catalog)}
+        return self._catalogOrder[dss_file]
+
+    @staticmethod
+    def _key(dss_file, path, window, convertTime):
+        # DSS pathnames are case-insensitive ('1Hour' and '1HOUR' name one record)
+        return (dss_file, path.upper(), tuple(window), convertTime)
+
+    def prefetch(self, dss_file, paths, window, convertTime=False):
+        fid = self.open(dss_file)
+        order = self.catalog_order(dss_file)
+        pending = {}
+        for path in paths:
+            key = self._key(dss_file, path, window, convertTime)
+            if key not in self._series:
+                pending.setdefault(key, path)
+        for key, path in sorted(pending.items(), key=lambda item: order.get(_catalog_key(item[1]), len(order))):
+            self._series[key] = readDssSeries(fid, path, window, convertTime)
+
+    def series(self, dss_file, path, window, convertTime=False):
+        series = self._series.get(self._key(dss_file, path, window, convertTime))
+        if series is None:
+            return readDssSeries(self.open(dss_file), path, window, convertTime)
+        return series
+
+    def read(self, dss_file, path, variable, window, convertTime=False):
+        times, values = self.series(dss_file, path, window, convertTime)
+        return pd.DataFrame(index = times, data = {variable: values})
+
+    def read_block(self, dss_file, paths, window, convertTime=False):
+        return {variable: self.series(dss_file, path, window, convertTime) for variable, path in paths.items()}
+
+    def release(self, dss_file, paths, window, convertTime=False):
+        # Drops the held series of paths once no writer needs them
+        for path in paths:
+            self._series.pop(self._key(dss_file, path, window, convertTime), None)
+
+    def clear(self):
+        self._series.clear()
+
+    def close(self):
+        self.clear()
+        for fid in self._handles.values():
+            fid.close()
+        self._handles.clear()
+        self._catalogs.clear()
+        self._catalogOrder.clear()
+
+
+_session = None
+_reader = 'hecdss'
+
+
+def use_reader(reader):
+    # Selects the reader get_session() opens DSS files with (default
+    # 'hecdss'); an open session on another reader is closed
+    global _reader, _session
+    _reader = reader
+    if _session is not None and _session.reader != reader:
+        _session.close()
+        _session = None
+
+
+def get_session():
+    global _session
+    if _session is None:
+        _session = DssSession(_reader)
+        atexit.register(_session.close)
+    return _session
+
+
+def collect_paths(paths):
+    # Flatten nested {reservoir: {variable: pathname}} lookups (or lists of them) into a pathname list
+    if isinstance(paths, str):
+        return [paths]
+    if isinstance(paths, dict):
+        paths = paths.values()
+    return [path for value in paths for path in collect_paths(value)]
+
+
+def process_paths(dss_file, paths, window, convertTime=False):
+    output_df = pd.DataFrame()
+
+    session = get_session()
+    for variable, path in paths.items():
+        df = session.read(dss_file, path, variable, window, convertTime)
+        output_df = pd.concat([output_df, df], axis=1)
+    output_df = output_df.stack().reset_index()
+    output_df.columns = ['date', 'variable', 'value']
+    return output_df
+
+
+def align_block(series):
+    # Put a block's {variable: (times, values)} series on one time axis as a
+    # (time x variable) matrix; NaN marks times a series does not cover
+    variables = list(series)
+    times = series[variables[0]][0]
+    if all(series[v][0].equals(times) for v in variables[1:]):
+        matrix = np.column_stack([np.asarray(series[v][1], dtype=float) for v in variables])
+        return times, variables, matrix
+
+    for v in variables[1:]:
+        times = times.union(series[v][0])
+    matrix = np.full((len(times), len(variables)), np.nan)
+    for j, v in enumerate(variables):
+        matrix[times.get_indexer(series[v][0]), j] = series[v][1]
+    return times, variables, matrix
+
+
+class LongFrameBuilder:
+    # Assembles the long date/variable/value table from raw series arrays.
+    # Each block is one process_paths worth of series plus its label columns
+    # (Reservoir/pct or alternative/reservoirName). to_frame() sizes every
+    # column up front and fills it in place, rather than growing frames with
+    # pd.concat and stack(). Row order, the NaN drop and the per-block index
+    # match process_paths followed by pd.concat.
+
+    def __init__(self):
+        self._blocks = []
+
+    def add_block(self, series, **labels):
+        self._blocks.append((series, labels))
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def to_frame(self):
+        plans = []
+        labelNames = []
+        variableNames = {}
+        total = 0
+        for series, labels in self._blocks:
+            times, variables, matrix = align_block(series)
+            keep = ~np.isnan(matrix)
+            codes = np.array([variableNames.setdefault(v, len(variableNames)) for v in variables])
+            plans.append((times, codes, matrix, keep, labels))
+            total += int(keep.sum())
+            for name in labels:
+                if name not in labelNames:
+                    labelNames.append(name)
+
+        dateDtype = plans[0][0].dtype if plans else 'datetime64[ns]'
+        date = np.empty(total, dtype=dateDtype)
+        variableCodes = np.empty(total, dtype=np.int16)
+        value = np.empty(total, dtype=float)
+        index = np.empty(total, dtype=np.int64)
+        labelColumns = {name: [] for name in labelNames}
+
+        start = 0
+        for times, codes, matrix, keep, labels in plans:
+            n = int(keep.sum())
+            stop = start + n
+            rows, cols = np.nonzero(keep)
+            date[start:stop] = times.values[rows]
+            variableCodes[start:stop] = codes[cols]
+            value[start:stop] = matrix[rows, cols]
+            index[start:stop] = np.arange(n)
+            for name in labelNames:
+                labelColumns[name].append((labels.get(name), n))
+            start = stop
+
+        columns = {
+            'date': date,
+            'variable': np.array(list(variableNames), dtype=object)[variableCodes],
+            'value': value,
+        }
+        for name, runs in labelColumns.items():
+            columns[name] = pd.Series([label for label, n in runs]).repeat([n for label, n in runs]).to_numpy()
+
+        return pd.DataFrame(columns, index=index)
+
+
+# float32 keeps about 7 significant digits: ~0.0001 ft on pool elevations
+# and ~0.03 cfs on a 350,000 cfs flow. The cast is lossy by that much for
+# every value; what it must not do is turn a value into something else,
+# so a float32 value column is only written if no finite value overflows
+# to inf and no nonzero value falls below float32's normal range (where it
+# would lose its digits or flush to zero).
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+FLOAT32_TINY = float(np.finfo(np.float32).tiny)
+
+
+def check_float32(values):
+    values = np.asarray(values, dtype=float)
+    magnitudes = np.abs(values)
+    invalid = (magnitudes > FLOAT32_MAX) & np.isfinite(values)
+    invalid |= (magnitudes < FLOAT32_TINY) & (magnitudes > 0)
+    if invalid.any():
+        i = int(np.argmax(invalid))
+        raise ValueError(f"value {float(values[i])!r} is outside the float32 range")
+    return values.astype(np.float32)
+
+
+def output_schema(labelFields, compact=False, float32=False):
+    # compact dictionary-encodes every string column with int8 keys and
+    # narrows integer labels (pct) to int8; float32 narrows the value column
+    fields = [('date', pa.timestamp('ns')), ('variable', pa.string()), ('value', pa.float64())]
+    fields += list(labelFields.items())
+    if compact:
+        fields = [
+            (name, pa.dictionary(pa.int8(), pa.string()) if arrowType == pa.string()
+                else pa.int8() if pa.types.is_integer(arrowType) else arrowType)
+            for name, arrowType in fields
+        ]
+    if float32:
+        fields[2] = ('value', pa.float32())
+    return pa.schema(fields, metadata=TIME_METADATA)
+
+
+def feather_compression(compression='lz4', compression_level=None):
+    # Feather/IPC codec keywords for --compression {none,lz4,zstd}
+    if compression == 'none':
+        return {'compression': 'uncompressed', 'compression_level': None}
+    return {'compression': compression, 'compression_level': compression_level}
+
+
+def ipc_compression(compression='lz4', compression_level=None):
+    if compression == 'none':
+        return None
+    return pa.Codec(compression, compression_level)
+
+
+class FeatherFrameWriter(LongFrameBuilder):
+    # Default output mode: collect every block, write the file on close.
+    # index=False leaves out the pandas index column (partitioned outputs).
+
+    def __init__(self, path, labelFields, compact=False, float32=False, compression='lz4', compression_level=None,
+                 index=True):
+        super().__init__()
+        self.path = path
+        self.schema = output_schema(labelFields, compact, float32)
+        self.compact = compact
+        self.float32 = float32
+        self.index = index
+        self.compression = feather_compression(compression, compression_level)
+
+    def to_table(self):
+        output = self.to_frame()
+        if self.float32:
+            output['value'] = check_float32(output['value'])
+        return pa.Table.from_pandas(output, preserve_index=False).cast(self.schema)
+
+    def close(self):
+        if self.index and not (self.compact or self.float32):
+            # What to_feather writes, plus the time zone next to the pandas metadata
+            table = pa.Table.from_pandas(self.to_frame())
+            table = table.replace_schema_metadata({**table.schema.metadata, **TIME_METADATA})
+            pyarrow.feather.write_feather(table, self.path, **self.compression)
+            return
+        pyarrow.feather.write_feather(self.to_table(), self.path, **self.compression)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        if excType is None:
+            self.close()
+
+
+def parquet_sort_keys(labelFields):
+    # Reservoir column first, then the other labels, variable and date, so
+    # each (Reservoir, pct) or (reservoirName, alternative) slice is contiguous
+    labels = sorted(labelFields, key=lambda name: name not in ('Reservoir', 'reservoirName'))
+    return labels + ['variable', 'date']
+
+
+def write_parquet(table, path, sortKeys, compression='lz4', compression_level=None):
+    # Row groups hold as many rows as the largest slice over the first two
+    # sort keys, so any one slice spans at most two groups and the column
+    # statistics let a filtered scan skip the rest
+    # --compact labels are dictionary columns, which Arrow cannot sort by;
+    # sort on their decoded values instead
+    keys = pa.table({
+        key: table[key].cast(table[key].type.value_type) if pa.types.is_dictionary(table[key].type) else table[key]
+        for key in sortKeys
+    })
+    table = table.take(pc.sort_indices(keys, sort_keys=[(key, 'ascending') for key in sortKeys]))
+    slices = table.group_by(sortKeys[:2]).aggregate([([], 'count_all')])
+    rowGroupSize = max(slices['count_all'].to_pylist(), default=0) or None
+    pyarrow.parquet.write_table(
+        table, path, row_group_size=rowGroupSize,
+        compression=compression, compression_level=compression_level
+    )
+
+
+class ParquetFrameWriter(FeatherFrameWriter):
+    # --format parquet: the frame writer's table, sorted and written in slice-sized row groups
+
+    def __init__(self, path, labelFields, compact=False, float32=False, compression='lz4', compression_level=None):
+        super().__init__(path, labelFields, compact, float32, compression, compression_level, index=False)
+        self.sortKeys = parquet_sort_keys(labelFields)
+        self.parquetCompression = compression
+        self.compressionLevel = compression_level
+
+    def close(self):
+        write_parquet(self.to_table(), self.path, self.sortKeys, self.parquetCompression, self.compressionLevel)
+
+
+def wide_schema(labelFields, variables, compact=False, float32=False):
+    # date, the label columns, then one value column per variable
+    fields = list(output_schema(labelFields, compact, float32))
+    return pa.schema(
+        [fields[0]] + fields[3:] + [pa.field(variable, fields[2].type) for variable in variables],
+        metadata=TIME_METADATA
+    )
+
+
+class WideFrameWriter(LongFrameBuilder):
+    # --layout wide: one row per timestamp per block (reservoir and pct, or
+    # reservoir and alternative) and one value column per variable, on the
+    # block's shared time axis from align_block. A variable the block does
+    # not carry, or has no value for at that time, is null; times with no
+    # values at all are dropped, as they are from the long table.
+
+    def __init__(self, path, labelFields, compact=False, float32=False, compression='lz4', compression_level=None,
+                 format='feather'):
+        super().__init__()
+        self.path = path
+        self.labelFields = labelFields
+        self.compact = compact
+        self.float32 = float32
+        self.format = format
+        self.compression = compression
+        self.compressionLevel = compression_level
+
+    def to_table(self):
+        blocks = []
+        variables = {}
+        for series, labels in self._blocks:
+            times, blockVariables, matrix = align_block(series)
+            keep = ~np.all(np.isnan(matrix), axis=1)
+            columns = np.array([variables.setdefault(v, len(variables)) for v in blockVariables], dtype=np.intp)
+            blocks.append((times.values[keep], columns, matrix[keep], labels))
+
+        total = sum(len(times) for times, _, _, _ in blocks)
+        date = np.empty(total, dtype='datetime64[ns]')
+        values = np.full((total, len(variables)), np.nan)
+        labelRuns = {name: [] for name in self.labelFields}
+        start = 0
+        for times, columns, matrix, labels in blocks:
+            stop = start + len(times)
+            date[start:stop] = times
+            values[start:stop, columns] = matrix
+            for name in self.labelFields:
+                labelRuns[name].append((labels[name], len(times)))
+            start = stop
+
+        if self.float32:
+            values = check_float32(values)
+        arrays = [pa.array(date)]
+        arrays += [
+            pa.array(pd.Series([label for label, n in runs]).repeat([n for label, n in runs]).to_numpy())
+            for runs in labelRuns.values()
+        ]
+        arrays += [pa.array(values[:, j], from_pandas=True) for j in range(len(variables))]
+        schema = wide_schema(self.labelFields, list(variables), self.compact, self.float32)
+        return pa.Table.from_arrays(arrays, names=schema.names).cast(schema)
+
+    def close(self):
+        table = self.to_table()
+        if self.format == 'parquet':
+            sortKeys = [key for key in parquet_sort_keys(self.labelFields) if key != 'variable']
+            write_parquet(table, self.path, sortKeys, self.compression, self.compressionLevel)
+        else:
+            pyarrow.feather.write_feather(table, self.path, **feather_compression(self.compression, self.compressionLevel))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        if excType is None:
+            self.close()
+
+
+class FeatherBlockWriter:
+    # Streaming output mode: every block becomes one record batch in an Arrow
+    # IPC (feather v2) file with a fixed schema, so only one block is ever
+    # held in memory. The file reads back through ds.dataset(format='feather')
+    # like a to_feather output, minus the pandas index column. Dictionary
+    # columns share one growing vocabulary per file, written as deltas.
+
+    def __init__(self, path, labelFields, compact=False, float32=False, compression='lz4', compression_level=None):
+        self.path = path
+        self.schema = output_schema(labelFields, compact, float32)
+        self.float32 = float32
+        self._vocab = {}
+        options = pa.ipc.IpcWriteOptions(
+            compression=ipc_compression(compression, compression_level), emit_dictionary_deltas=True
+        )
+        self._writer = pa.ipc.new_file(path, self.schema, options=options)
+
+    def _encode(self, field, codes, names):
+        # codes index into names; build the column in the field's type
+        if pa.types.is_dictionary(field.type):
+            vocab = self._vocab.setdefault(field.name, {})
+            mapping = np.array([vocab.setdefault(name, len(vocab)) for name in names], dtype=np.int8)
+            return pa.DictionaryArray.from_arrays(pa.array(mapping[codes]), pa.array(list(vocab), type=pa.string()))
+        return pa.array(np.asarray(names, dtype=object)[codes], type=field.type)
+
+    def add_block(self, series, **labels):
+        times, variables, matrix = align_block(series)
+        rows, cols = np.nonzero(~np.isnan(matrix))
+        values = matrix[rows, cols]
+        if self.float32:
+            values = check_float32(values)
+
+        fields = list(self.schema)
+        columns = [
+            pa.array(times.values[rows]).cast(pa.timestamp('ns')),
+            self._encode(fields[1], cols, variables),
+            pa.array(values, type=fields[2].type),
+        ]
+        for field in fields[3:]:
+            columns.append(self._encode(field, np.zeros(len(rows), dtype=np.intp), [labels[field.name]]))
+        self._writer.write_batch(pa.record_batch(columns, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        self.close()
+
+
+def partition_path(root, partition, format='feather', layout='long'):
+    # e.g. root/dataset=FVA_config/year=1997/config=With/scale=100/part-0.feather;
+    # wide outputs are named wide-0 so the two layouts can share a tree
+    fileName = f"{'wide' if layout == 'wide' else 'part'}-0.{format}"
+    return os.path.join(root, *[f"{key}={partition[key]}" for key in PARTITION_KEYS], fileName)
+
+
+def output_path(inputs, partitioned=None, format='feather', layout='long'):
+    # inputs is a converter's scenario_inputs() dict
+    if partitioned:
+        return partition_path(partitioned, inputs['partition'], format, layout)
+    suffix = '.wide' if layout == 'wide' else ''
+    return os.path.splitext(inputs['output'])[0] + f'{suffix}.{format}'
+
+
+def open_output(inputs, labelFields, stream=False, partitioned=None, format='feather', layout='long', durations=True,
+                summary=True, **options):
+    # labelFields maps each label column to its Arrow type, e.g.
+    # {'Reservoir': pa.string(), 'pct': pa.int64()}; options are the
+    # compact/float32/compression/compression_level write options. With
+    # partitioned set to a dataset root the output goes to the scenario's
+    # hive partition under it instead of inputs['output'], without the
+    # pandas index column so every fragment of one kind shares a schema.
+    # durations and summary are only used by open_durations and open_summary.
+    path = output_path(inputs, partitioned, format, layout)
+    if partitioned:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    if layout == 'wide':
+        if stream:
+            raise ValueError("--stream needs every variable up front; it cannot be combined with --layout wide")
+        return WideFrameWriter(path, labelFields, format=format, **options)
+    if format == 'parquet':
+        if stream:
+            raise ValueError("--stream writes Arrow IPC record batches; it cannot be combined with --format parquet")
+        return ParquetFrameWriter(path, labelFields, **options)
+    if stream:
+        return FeatherBlockWriter(path, labelFields, **options)
+    return FeatherFrameWriter(path, labelFields, index=not partitioned, **options)
+
+
+# calculateDurations resamples each duration's hours to a 6-hour grid and
+# counts a grid time when an hour of that duration is within an hour of it
+DURATION_GRID = np.timedelta64(6, 'h')
+DURATION_TOLERANCE = np.timedelta64(1, 'h')
+
+
+def duration_bars(times, values):
+    # calculateDurations of one DURATION series straight from its arrays:
+    # (BeginDate, EndDate, Consecutive, duration) arrays of its bars, one
+    # per run of covered grid times, duration after duration
+    keep = values > 0
+    times, codes = np.asarray(times, dtype='datetime64[ns]')[keep], values[keep]
+    durations = {}
+    for code in np.unique(codes):
+        for duration in DURATION_CODES.get(code, '').split(', '):
+            durations.setdefault(duration, []).append(code)
+
+    begin, end, consecutive, names = [], [], [], []
+    for duration in sorted(durations):
+        dates = times[np.isin(codes, durations[duration])]
+        grid = dates[0] + DURATION_GRID * np.arange((dates[-1] - dates[0]) // DURATION_GRID + 1)
+        after = np.minimum(np.searchsorted(dates, grid), len(dates) - 1)
+        before = np.maximum(after - 1, 0)
+        covered = (np.abs(dates[after] - grid) <= DURATION_TOLERANCE) | (np.abs(grid - dates[before]) <= DURATION_TOLERANCE)
+
+        changes = np.flatnonzero(np.diff(covered.astype(np.int8))) + 1
+        starts = np.concatenate([[0], changes])
+        stops = np.concatenate([changes, [len(covered)]])
+        runs = covered[starts]
+        starts, stops = starts[runs], stops[runs]
+        begin.append(grid[starts])
+        end.append(grid[stops - 1])
+        consecutive.append(stops - starts)
+        names += [duration] * len(starts)
+    if not names:
+        return np.empty(0, 'datetime64[ns]'), np.empty(0, 'datetime64[ns]'), np.empty(0, np.int64), []
+    return np.concatenate(begin), np.concatenate(end), np.concatenate(consecutive).astype(np.int64), names
+
+
+class DurationTableWriter:
+    # Companion table of controlling-duration bars: the calculateDurations
+    # bars of each block (reservoir and pct) decoded from its DURATION
+    # series at ingest by duration_bars, so the app and renderers read
+    # BeginDate/EndDate/Consecutive/duration instead of decoding DURCODEs on
+    # every render
+
+    def __init__(self, path, labelFields, compression='lz4', compression_level=None):
+        self.path = path
+        self.schema = pa.schema(
+            list(labelFields.items()) + [
+                ('BeginDate', pa.timestamp('ns')),
+                ('EndDate', pa.timestamp('ns')),
+                ('Consecutive', pa.int64()),
+                ('duration', pa.string()),
+            ],
+            metadata=TIME_METADATA
+        )
+        self.compression = feather_compression(compression, compression_level)
+        self._tables = []
+
+    def add_block(self, series, **labels):
+        if 'DURATION' not in series:
+            return
+        times, values = series['DURATION']
+        bars = duration_bars(times, np.asarray(values, dtype=float))
+        if len(bars[3]):
+            count = len(bars[3])
+            columns = [pa.array([labels[field.name]] * count, field.type) for field in list(self.schema)[:-4]]
+            self._tables.append(pa.table(columns + [pa.array(column) for column in bars], schema=self.schema))
+
+    def close(self):
+        if self._tables:
+            table = pa.concat_tables(self._tables).combine_chunks()
+        else:
+            table = self.schema.empty_table()
+        pyarrow.feather.write_feather(table, self.path, **self.compression)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        if excType is None:
+            self.close()
+
+
+class _NoTable:
+    # open_durations()/open_summary() stand-in when --no-durations/--no-summary is given
+
+    def add_block(self, series, **labels):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        pass
+
+
+def open_durations(inputs, labelFields, durations=True, partitioned=None, format='feather', layout='long',
+                   compression='lz4', compression_level=None, **options):
+    # Takes the same keywords as open_output; the table goes next to the
+    # scenario's output (see scenarioData.duration_path)
+    if not durations:
+        return _NoTable()
+    path = duration_path(output_path(inputs, partitioned, format, layout))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    return DurationTableWriter(path, labelFields, compression, compression_level)
+
+
+# 1 cfs for one hour, in acre-feet
+ACRE_FEET_PER_CFS_HOUR = 3600 / 43560
+
+
+def summarize_series(times, values, threshold=None):
+    # Peak, time of peak and, with a threshold, the hours and acre-feet above
+    # it. Each value holds until the next time, so the last value adds no time.
+    keep = ~np.isnan(values)
+    times, values = pd.DatetimeIndex(times[keep]), values[keep]
+    if not len(values):
+        return None
+    peak = int(values.argmax())
+    summary = {'peak': values[peak], 'peak_date': times[peak],
+               'threshold': threshold, 'hours_above': None, 'volume_above': None}
+    if threshold is not None:
+        hours = np.diff(times.values) / np.timedelta64(1, 'h')
+        above = np.maximum(values[:-1] - threshold, 0.0)
+        summary['hours_above'] = float(hours[above > 0].sum())
+        summary['volume_above'] = float((above * hours).sum() * ACRE_FEET_PER_CFS_HOUR)
+    return summary
+
+
+class SummaryTableWriter:
+    # Per-output summary table (see scenarioData.SUMMARY_FIELDS): one row per
+    # series of each block, plus FIRO encroachment where a block has both
+    # POOL-ELEV and FIRO-TARGET, so questions across the whole corpus are
+    # answered from scenarioData.scenario_summaries() instead of a scan of
+    # every output. Written uncompressed: a table is a few dozen rows, and
+    # decompressing ~300 of them costs more than the bytes saved.
+
+    def __init__(self, path, labelFields, partition):
+        self.path = path
+        # Some converters carry the year as a string; store every key as its partition type
+        self.partition = {
+            field.name: int(partition[field.name]) if pa.types.is_integer(field.type) else partition[field.name]
+            for field in PARTITIONING.schema
+        }
+        self.schema = pa.schema(
+            list(PARTITIONING.schema) + list(labelFields.items()) + SUMMARY_FIELDS,
+            metadata=TIME_METADATA
+        )
+        self._rows = []
+
+    def add_block(self, series, **labels):
+        for variable, (times, values) in series.items():
+            summary = summarize_series(times, np.asarray(values, dtype=float), FLOW_THRESHOLDS.get(variable))
+            if summary is not None:
+                self._rows.append({**labels, 'variable': variable, **summary})
+        if 'POOL-ELEV' in series and 'FIRO-TARGET' in series:
+            times, variables, matrix = align_block({v: series[v] for v in ['POOL-ELEV', 'FIRO-TARGET']})
+            summary = summarize_series(times, matrix[:, 0] - matrix[:, 1], 0.0)
+            if summary is not None:
+                summary['volume_above'] = None
+                self._rows.append({**labels, 'variable': ENCROACHMENT, **summary})
+
+    def close(self):
+        rows = [{**self.partition, **row} for row in self._rows]
+        table = pa.Table.from_pylist(rows, schema=self.schema) if rows else self.schema.empty_table()
+        pyarrow.feather.write_feather(table, self.path, compression='uncompressed')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        if excType is None:
+            self.close()
+
+
+def open_summary(inputs, labelFields, summary=True, partitioned=None, format='feather', layout='long', **options):
+    # Takes the same keywords as open_output; the table goes next to the
+    # scenario's output (see scenarioData.summary_path)
+    if not summary:
+        return _NoTable()
+    path = summary_path(output_path(inputs, partitioned, format, layout))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    return SummaryTableWriter(path, labelFields, inputs['partition'])
+
+
+def sidecar_paths(inputs, options):
+    # Companion tables open_summary and open_durations write next to
+    # inputs['output'] under options; durations only for inputs whose kind
+    # has a DURATION series (inputs['durations'])
+    paths = []
+    if options.get('summary', True):
+        paths.append(summary_path(inputs['output']))
+    if options.get('durations', True) and inputs.get('durations'):
+        paths.append(duration_path(inputs['output']))
+    return paths
+
+
+def _hash_file(path, chunkSize=8 * 1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunkSize), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    # Records, per output file, the source DSS fingerprint, event window and
+    # pathname list it was built from. A source is only re-hashed when its
+    # size or mtime differs from what the manifest already knows.
+
+    def __init__(self, path):
+        self.path = path
+        self.records = self._load()
+        self._fingerprints = {}
+        self._updated = set()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as fh:
+            return json.load(fh).get('outputs', {})
+
+    def fingerprint(self, source):
+        if source not in self._fingerprints:
+            stat = os.stat(source)
+            fingerprint = {'size': stat.st_size, 'mtime': stat.st_mtime}
+            for record in self.records.values():
+                known = record['fingerprint']
+                if record['source'] == source and known['size'] == stat.st_size and known['mtime'] == stat.st_mtime:
+                    fingerprint['sha256'] = known['sha256']
+                    break
+            else:
+                fingerprint['sha256'] = _hash_file(source)
+            self._fingerprints[source] = fingerprint
+        return self._fingerprints[source]
+
+    def record_for(self, inputs, options):
+        return {
+            'source': inputs['source'],
+            'fingerprint': self.fingerprint(inputs['source']),
+            'window': [str(t) for t in inputs['window']],
+            'paths': collect_paths(inputs['paths']),
+            'options': options,
+        }
+
+    def is_current(self, inputs, options):
+        # The output and every companion table the options imply must exist,
+        # so a deleted sidecar is written again
+        previous = self.records.get(inputs['output'])
+        if previous is None:
+            return False
+        if not all(os.path.exists(path) for path in [inputs['output']] + sidecar_paths(inputs, options)):
+            return False
+        current = self.record_for(inputs, options)
+        return (
+            previous['source'] == current['source']
+            and previous['fingerprint']['sha256'] == current['fingerprint']['sha256']
+            and previous['window'] == current['window']
+            and previous['paths'] == current['paths']
+            and previous.get('options', {}) == current['options']
+        )
+
+    def update(self, inputs, options):
+        self.records[inputs['output']] = self.record_for(inputs, options)
+        self._updated.add(inputs['output'])
+
+    def save(self):
+        # Merge into whatever is on disk so converters sharing the manifest keep each other's records
+        records = self._load()
+        records.update({output: self.records[output] for output in self._updated})
+        tmpPath = self.path + '.tmp'
+        with open(tmpPath, 'w') as fh:
+            json.dump({'outputs': records}, fh, indent=1, sort_keys=True)
+        os.replace(tmpPath, self.path)
+
+
+def add_ingest_arguments(parser):
+    parser.add_argument('--workers', type=int, default=1,
+        help='number of worker processes for the scenario matrix (1 runs serially)')
+    parser.add_argument('--manifest', default=os.path.join('data', 'ingest_manifest.json'),
+        help='manifest of source fingerprints used to skip outputs whose inputs are unchanged')
+    parser.add_argument('--force', action='store_true',
+        help='regenerate every output even if the manifest says it is current')
+    parser.add_argument('--stream', action='store_true',
+        help='stream each (reservoir, pct) block to the output as an Arrow record batch')
+    parser.add_argument('--compact', action='store_true',
+        help='dictionary-encode label columns with int8 keys and store pct as int8')
+    parser.add_argument('--float32', action='store_true',
+        help='store values as float32, a lossy cast to ~7 significant digits; values outside the float32 range '
+             'are rejected')
+    parser.add_argument('--compression', choices=['none', 'lz4', 'zstd'], default='lz4',
+        help='feather/IPC/parquet compression codec')
+    parser.add_argument('--compression-level', type=int, default=None,
+        help='codec level (zstd 1-22; ignored by lz4)')
+    parser.add_argument('--format', choices=['feather', 'parquet'], default='feather',
+        help='parquet sorts each output by its labels and writes one row group per (reservoir, pct) slice')
+    parser.add_argument('--layout', choices=['long', 'wide'], default='long',
+        help='wide writes one row per timestamp per (reservoir, pct/alternative) with one column per variable')
+    parser.add_argument('--no-durations', action='store_true',
+        help='do not write the controlling-duration companion table next to EST outputs')
+    parser.add_argument('--no-summary', action='store_true',
+        help='do not write the per-series peak/threshold summary table next to each output')
+    parser.add_argument('--partitioned', metavar='ROOT', default=None,
+        help='write into one hive-partitioned dataset under ROOT (dataset=/year=/config=/scale=/) '
+             'instead of one file per scenario')
+    return parser
+
+
+def parse_ingest_args(description=None, parser=None):
+    # parser may already carry script-specific arguments
+    parser = parser or argparse.ArgumentParser(description=description)
+    add_ingest_arguments(parser)
+    args = parser.parse_args()
+    if args.stream and args.format == 'parquet':
+        parser.error('--stream cannot be combined with --format parquet')
+    if args.stream and args.layout == 'wide':
+        parser.error('--stream cannot be combined with --layout wide')
+    return args
+
+
+def write_options(args):
+    # Output options every converter's convert_scenario accepts as keywords
+    return {
+        'stream': args.stream,
+        'compact': args.compact,
+        'float32': args.float32,
+        'compression': args.compression,
+        'compression_level': args.compression_level,
+        'partitioned': args.partitioned,
+        'format': args.format,
+        'layout': args.layout,
+        'durations': not args.no_durations,
+        'summary': not args.no_summary,
+    }
+
+
+def _timed_job(convert, job, options, reader=None):
+    if reader is not None:
+        use_reader(reader)
+    start = time.perf_counter()
+    convert(*job, **options)
+    return job, time.perf_counter() - start
+
+
+def run_jobs(convert, jobs, workers=1, inputs=None, manifest=None, force=False, options=None, reader=None,
+             plan=None):
+    # Each job is the argument tuple for one output file, e.g.
+    # (dataset, patternYear, arc_spillway_config, scaleFactor). Jobs write
+    # their own file, so running them out of order leaves the output
+    # identical to the serial loop. When inputs (job -> output/source/
+    # window/paths) and a manifest path are given, jobs whose output is
+    # already current are skipped and the manifest is updated as jobs finish.
+    # options (see write_options) are passed to convert as keywords and
+    # recorded in the manifest, so changing the output format regenerates.
+    # reader (see DSS_READERS) is selected in every worker before its jobs run.
+    # plan, if given, groups the jobs left to run into units of work (tuples
+    # of jobs) and convert is called once per unit as convert(*unit).
+    options = options or {}
+    timings = []
+    start = time.perf_counter()
+
+    jobInputs = {}
+    if inputs is not None and manifest is not None:
+        manifest = IngestManifest(manifest)
+        pending = []
+        for job in jobs:
+            jobInputs[job] = dict(inputs(*job))
+            jobInputs[job]['output'] = output_path(jobInputs[job], options.get('partitioned'),
+                options.get('format', 'feather'), options.get('layout', 'long'))
+            if not force and manifest.is_current(jobInputs[job], options):
+                manifest.update(jobInputs[job], options)
+            else:
+                pending.append(job)
+        print(f"{len(jobs) - len(pending)} of {len(jobs)} outputs are current, regenerating {len(pending)}")
+        jobs = pending
+    else:
+        manifest = None
+
+    units = plan(jobs) if plan is not None else jobs
+
+    def unit_jobs(unit):
+        return unit if plan is not None else [unit]
+
+    def finished(unit, elapsed):
+        if plan is None:
+            print(f"{unit}: {elapsed:.1f} s")
+        else:
+            print(f"{len(unit)} output(s) from {unit[0]}{' ...' if len(unit) > 1 else ''}: {elapsed:.1f} s")
+        timings.append((unit, elapsed))
+        if manifest is not None:
+            for job in unit_jobs(unit):
+                manifest.update(jobInputs[job], options)
+            manifest.save()
+
+    if workers <= 1:
+        for unit in units:
+            finished(*_timed_job(convert, unit, options, reader))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_timed_job, convert, unit, options, reader) for unit in units]
+            for future in as_completed(futures):
+                finished(*future.result())
+
+    if manifest is not None:
+        manifest.save()
+
+    print(f"{len(timings)} {'passes' if plan is not None else 'jobs'} on {max(workers, 1)} worker(s): {time.perf_counter() - start:.1f} s wall, "
+          f"{sum(elapsed for _, elapsed in timings):.1f} s summed job time")
+    return timings
@@ -0,0 +1,44 @@
+from dssIngest import DurationTableWriter
+from exportWide import long_blocks
+from partitionFeather import scenario_partition
+from scenarioData import duration_path
+import pyarrow.feather
+import argparse
+import glob
+import os
+
+
+# Writes the controlling-duration companion table (<stem>_durations.feather)
+# the converters now produce, for EST feather files already in data/
+
+
+def is_est_file(path):
+    # A long-layout EST feather output (not a baseline or companion file)
+    partition = scenario_partition(os.path.basename(path))
+    return partition is not None and partition[0]['dataset'] != 'baseline'
+
+
+def export_file(path, compression='lz4', compression_level=None):
+    _, estLabelFields = scenario_partition(os.path.basename(path))
+    table = pyarrow.feather.read_table(path, columns=['date', 'variable', 'value'] + list(estLabelFields))
+    output = duration_path(path)
+    with DurationTableWriter(output, estLabelFields, compression, compression_level) as durations:
+        for series, labels in long_blocks(table, estLabelFields):
+            durations.add_block(series, **labels)
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write duration companion tables for the EST files in data/')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--compression', choices=['none', 'lz4', 'zstd'], default='lz4')
+    parser.add_argument('--compression-level', type=int, default=None)
+    args = parser.parse_args()
+
+    files = [
+        path for path in sorted(glob.glob(os.path.join(args.data, '*.feather')))
+        if is_est_file(path)
+    ]
+    for path in files:
+        export_file(path, args.compression, args.compression_level)
+    print(f"{len(files)} duration tables written to {args.data}")
@@ -0,0 +1,38 @@
+from dssIngest import TIME_METADATA, parquet_sort_keys, write_parquet
+from partitionFeather import scenario_partition
+import pyarrow.feather
+import argparse
+import glob
+import os
+
+
+# Writes a sorted, slice-sized row group .parquet next to each scenario
+# feather file in data/; scenarioData.scenario_file() prefers it on load
+
+
+def export_file(path, outDir, compression='lz4', compression_level=None):
+    partition, labelFields = scenario_partition(os.path.basename(path))
+    table = pyarrow.feather.read_table(path)
+    table = table.select(['date', 'variable', 'value'] + list(labelFields))
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **TIME_METADATA})
+
+    output = os.path.join(outDir, os.path.splitext(os.path.basename(path))[0] + '.parquet')
+    write_parquet(table, output, parquet_sort_keys(labelFields), compression, compression_level)
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export data/ feather files to sorted Parquet')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--out', default=None, help='output directory (default: next to the feather files)')
+    parser.add_argument('--compression', choices=['none', 'lz4', 'zstd'], default='lz4')
+    parser.add_argument('--compression-level', type=int, default=None)
+    args = parser.parse_args()
+
+    files = [
+        path for path in sorted(glob.glob(os.path.join(args.data, '*.feather')))
+        if scenario_partition(os.path.basename(path)) is not None
+    ]
+    for path in files:
+        export_file(path, args.out or args.data, args.compression, args.compression_level)
+    print(f"{len(files)} files exported to {args.out or args.data}")
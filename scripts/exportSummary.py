@@ -0,0 +1,41 @@
+from dssIngest import SummaryTableWriter
+from exportWide import long_blocks
+from partitionFeather import scenario_partition
+from scenarioData import scenario_summaries, summary_path
+import pyarrow.feather
+import argparse
+import glob
+import os
+import time
+
+
+# Writes the per-series summary table (<stem>_summary.feather) the
+# converters now produce, for the scenario feather files already in data/
+
+
+def export_file(path):
+    partition, labelFields = scenario_partition(os.path.basename(path))
+    table = pyarrow.feather.read_table(path, columns=['date', 'variable', 'value'] + list(labelFields))
+    output = summary_path(path)
+    with SummaryTableWriter(output, labelFields, partition) as summary:
+        for series, labels in long_blocks(table, labelFields):
+            summary.add_block(series, **labels)
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write summary tables for the scenario files in data/')
+    parser.add_argument('--data', default='data')
+    args = parser.parse_args()
+
+    files = [
+        path for path in sorted(glob.glob(os.path.join(args.data, '*.feather')))
+        if scenario_partition(os.path.basename(path)) is not None
+    ]
+    for path in files:
+        export_file(path)
+    print(f"{len(files)} summary tables written to {args.data}")
+
+    start = time.perf_counter()
+    summaries = scenario_summaries(args.data)
+    print(f"{len(summaries)} summary rows assembled in {1000 * (time.perf_counter() - start):.1f} ms")
@@ -0,0 +1,55 @@
+from dssIngest import WideFrameWriter
+from partitionFeather import scenario_partition
+import pandas as pd
+import pyarrow.feather
+import argparse
+import glob
+import os
+
+
+# Writes the --layout wide equivalent (<stem>.wide.feather or .wide.parquet)
+# of each scenario feather file in data/, without going back to DSS
+
+
+def long_blocks(table, labelFields):
+    # The long table's (series, labels) blocks, in file order
+    frame = table.to_pandas()
+    for labels, block in frame.groupby(list(labelFields), sort=False):
+        series = {
+            variable: (pd.DatetimeIndex(rows['date']), rows['value'].to_numpy())
+            for variable, rows in block.groupby('variable', sort=False)
+        }
+        yield series, dict(zip(labelFields, labels))
+
+
+def export_file(path, outDir, format='feather', compact=False, float32=False, compression='lz4', compression_level=None):
+    partition, labelFields = scenario_partition(os.path.basename(path))
+    table = pyarrow.feather.read_table(path)
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    output = os.path.join(outDir, f'{stem}.wide.{format}')
+    with WideFrameWriter(output, labelFields, compact, float32, compression, compression_level, format=format) as writer:
+        for series, labels in long_blocks(table, labelFields):
+            writer.add_block(series, **labels)
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export data/ feather files to the wide one-column-per-variable layout')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--out', default=None, help='output directory (default: next to the feather files)')
+    parser.add_argument('--format', choices=['feather', 'parquet'], default='feather')
+    parser.add_argument('--compact', action='store_true')
+    parser.add_argument('--float32', action='store_true')
+    parser.add_argument('--compression', choices=['none', 'lz4', 'zstd'], default='lz4')
+    parser.add_argument('--compression-level', type=int, default=None)
+    args = parser.parse_args()
+
+    files = [
+        path for path in sorted(glob.glob(os.path.join(args.data, '*.feather')))
+        if scenario_partition(os.path.basename(path)) is not None
+    ]
+    for path in files:
+        export_file(path, args.out or args.data, args.format, args.compact, args.float32,
+                    args.compression, args.compression_level)
+    print(f"{len(files)} files exported to {args.out or args.data}")
@@ -0,0 +1,272 @@
+from dssIngest import (
+    CatalogError, DssSession, check_catalog, get_session, open_durations, open_output, open_summary,
+    parse_ingest_args, run_jobs, use_reader, write_options
+)
+from ingestSpec import DATASETS, DEFAULT_DATASETS, KINDS, estAlternative, reservoirs
+from scenarioData import scenario_catalog
+from contextlib import ExitStack
+import argparse
+import itertools
+import math
+import sys
+
+
+# Converts the datasets described in ingestSpec. Every output is one
+# (dataset, year, config, scale) scenario; outputs are grouped into read
+# passes, each of which reads its series from one DSS file in catalog order,
+# every pathname once, and then writes all of its outputs.
+
+# Series a pass holds in memory at most (~35 MB at 529 hourly values),
+# unless a set of outputs sharing pathnames needs more
+PASS_SERIES = 4096
+
+
+def scenario_keys(datasets):
+    return [
+        (dataset, year, config, scale)
+        for dataset in datasets
+        for year, scales in DATASETS[dataset]['scales'].items()
+        for config in DATASETS[dataset]['configs']
+        for scale in scales
+    ]
+
+
+def block_labels(spec, kind):
+    # Label values of each block, in write order, keyed in label column order
+    values = {kind['reservoir']: reservoirs, 'pct': spec.get('pcts'), 'alternative': list(spec.get('alternatives', {}))}
+    for combination in itertools.product(*[values[name] for name in kind['blocks']]):
+        labels = dict(zip(kind['blocks'], combination))
+        yield {name: labels[name] for name in kind['labelFields']}
+
+
+def scenario_inputs(dataset, year, config, scale):
+    spec = DATASETS[dataset]
+    kind = KINDS[spec['kind']]
+
+    blocks = []
+    for labels in block_labels(spec, kind):
+        if 'alternatives' in spec:
+            alternative = spec['alternatives'][labels['alternative']]
+        else:
+            alternative = spec['alternative']
+        alternative = alternative.format(alt=estAlternative, cfg=spec['configs'][config], pct=labels.get('pct'),
+            letter=spec.get('letters', {}).get(year), trial=spec.get('trials', {}).get(year))
+        templates = kind['paths'][labels[kind['reservoir']]]
+        blocks.append((labels, {
+            variable: template.format(scale=scale, alternative=alternative)
+            for variable, template in templates.items()
+        }))
+
+    return {
+        'output': kind['output'].format(year=year, scale=scale, config=config, dataset=dataset),
+        'source': spec['sources'][year],
+        'window': kind['window'][str(year)],
+        'convertTime': kind['convertTime'],
+        'paths': [path for labels, paths in blocks for path in paths.values()],
+        'blocks': blocks,
+        'partition': {'dataset': dataset, 'year': year, 'config': config, 'scale': scale},
+        'kind': spec['kind'],
+        'durations': kind['durations'],
+    }
+
+
+def _reads(inputs):
+    # The distinct series an output reads; DSS pathnames are case-insensitive
+    return {(inputs['source'], path.upper(), tuple(inputs['window']), inputs['convertTime']) for path in inputs['paths']}
+
+
+def plan_passes(keys, workers=1):
+    # Groups outputs into read passes. Outputs that read any same series
+    # always share a pass, so each pathname is read once however the
+    # datasets overlap. The outputs of one DSS file are then split into at
+    # least `workers` passes of about PASS_SERIES series each.
+    inputs = {key: scenario_inputs(*key) for key in keys}
+    reads = {key: _reads(inputs[key]) for key in keys}
+    order = {key: i for i, key in enumerate(keys)}
+
+    parent = {key: key for key in keys}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    owners = {}
+    for key in keys:
+        for read in reads[key]:
+            if read in owners:
+                parent[find(key)] = find(owners[read])
+            else:
+                owners[read] = key
+
+    groups = {}
+    for key in keys:
+        groups.setdefault(find(key), []).append(key)
+
+    bySource = {}
+    for group in groups.values():
+        source = inputs[group[0]]['source']
+        series = len(set().union(*[reads[key] for key in group]))
+        bySource.setdefault(source, []).append((series, group))
+
+    passes = []
+    for groups in bySource.values():
+        total = sum(series for series, group in groups)
+        count = min(len(groups), max(workers, math.ceil(total / PASS_SERIES)))
+        bins = [[0, []] for _ in range(count)]
+        for series, group in sorted(groups, key=lambda item: -item[0]):
+            smallest = min(bins, key=lambda item: item[0])
+            smallest[0] += series
+            smallest[1].extend(group)
+        passes += [tuple(sorted(group, key=order.get)) for series, group in bins]
+    return passes
+
+
+def convert_pass(*keys, **writeOptions):
+    outputs = [scenario_inputs(*key) for key in keys]
+    session = get_session()
+    stream = writeOptions.get('stream', False)
+
+    if not stream:
+        # One catalog-ordered sweep per file and window over the union of the
+        # outputs' pathnames; the session reads each distinct pathname once
+        sweeps = {}
+        for inputs in outputs:
+            sweep = (inputs['source'], tuple(inputs['window']), inputs['convertTime'])
+            sweeps.setdefault(sweep, []).extend(inputs['paths'])
+        for (source, window, convertTime), paths in sweeps.items():
+            session.prefetch(source, paths, list(window), convertTime)
+
+    # With --stream each block's series are read (in catalog order) just
+    # before it is written and dropped after the last block that uses
+    # them, so a pass holds one block plus the series later blocks share
+    # rather than every series of the pass
+    uses = {}
+    if stream:
+        for inputs in outputs:
+            for labels, paths in inputs['blocks']:
+                for path in paths.values():
+                    read = (inputs['source'], path.upper(), tuple(inputs['window']), inputs['convertTime'])
+                    uses[read] = uses.get(read, 0) + 1
+
+    # Every output of the pass is open at once and fed from the shared reads
+    with ExitStack() as stack:
+        sinks = []
+        for inputs in outputs:
+            kind = KINDS[inputs['kind']]
+            writers = [
+                stack.enter_context(open_output(inputs, kind['labelFields'], **writeOptions)),
+                stack.enter_context(open_summary(inputs, kind['labelFields'], **writeOptions)),
+            ]
+            if kind['durations']:
+                writers.append(stack.enter_context(open_durations(inputs, kind['labelFields'], **writeOptions)))
+            sinks.append((inputs, writers))
+
+        for inputs, writers in sinks:
+            source, window, convertTime = inputs['source'], inputs['window'], inputs['convertTime']
+            for labels, paths in inputs['blocks']:
+                if stream:
+                    session.prefetch(source, paths.values(), list(window), convertTime)
+                series = session.read_block(source, paths, window, convertTime)
+                for writer in writers:
+                    writer.add_block(series, **labels)
+                if stream:
+                    done = []
+                    for path in paths.values():
+                        read = (source, path.upper(), tuple(window), convertTime)
+                        uses[read] -= 1
+                        if not uses[read]:
+                            done.append(path)
+                    session.release(source, done, window, convertTime)
+
+    session.clear()
+
+
+def spec_problems(keys):
+    # Template mistakes visible without the files: scenarios writing the
+    # same output, and blocks of one reservoir reading the same pathname
+    # for a variable (a template that ignores a label, e.g. pct)
+    problems = []
+    outputs = {}
+    for key in keys:
+        inputs = scenario_inputs(*key)
+        if inputs['output'] in outputs:
+            problems.append(f"duplicate output {inputs['output']} from {outputs[inputs['output']]} and {key}")
+        outputs.setdefault(inputs['output'], key)
+
+        reservoir = KINDS[inputs['kind']]['reservoir']
+        readers = {}
+        for labels, paths in inputs['blocks']:
+            for variable, path in paths.items():
+                first = readers.setdefault((labels[reservoir], variable, path.upper()), labels)
+                if first != labels:
+                    problems.append(f"duplicate {path} in {inputs['output']}, read for {first} and {labels}")
+    return problems
+
+
+def preflight(keys, session):
+    # Resolves every pathname the scenarios need against each source file's
+    # catalog, loaded once, and raises CatalogError listing all the
+    # problems before any series is read
+    problems = {}
+    specProblems = spec_problems(keys)
+    if specProblems:
+        problems['ingestSpec'] = specProblems
+
+    requests = {}
+    for key in keys:
+        inputs = scenario_inputs(*key)
+        requests.setdefault(inputs['source'], []).extend((path, inputs['window']) for path in inputs['paths'])
+    for source, sourceRequests in requests.items():
+        catalog = session.catalog(source)
+        if catalog is None:
+            print(f"{source}: the reader has no catalog, pathnames not checked")
+            continue
+        sourceProblems = check_catalog(catalog, sourceRequests) if catalog else ['the file is empty or does not exist']
+        if sourceProblems:
+            problems[source] = sourceProblems
+
+    if problems:
+        raise CatalogError(problems)
+    reads = sum(len(sourceRequests) for sourceRequests in requests.values())
+    print(f"{len(keys)} scenarios: {reads:,} pathnames resolved in {len(requests)} file(s)")
+
+
+def run_ingest(datasets, workers=1, manifest=None, force=False, options=None, reader=None, limit=None,
+               validate=True):
+    # limit keeps only the first N scenarios of the datasets. validate runs
+    # the catalog preflight first; serial runs keep its session open, so
+    # each catalog is loaded once
+    keys = scenario_keys(datasets)[:limit]
+    if validate:
+        if workers <= 1:
+            if reader is not None:
+                use_reader(reader)
+            preflight(keys, get_session())
+        else:
+            # Workers open their own handles, so the parent's are closed
+            # before the pool forks
+            session = DssSession(reader or 'hecdss')
+            try:
+                preflight(keys, session)
+            finally:
+                session.close()
+    return run_jobs(convert_pass, keys, workers=workers, inputs=scenario_inputs, manifest=manifest, force=force,
+        options=options, reader=reader, plan=lambda pending: plan_passes(pending, workers))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert the DSS scenario matrix described in ingestSpec')
+    parser.add_argument('--dataset', action='append', choices=list(DATASETS),
+        help=f"dataset to convert, repeatable (default: {', '.join(DEFAULT_DATASETS)})")
+    parser.add_argument('--no-validate', action='store_true',
+        help='skip resolving every pathname against the DSS catalogs before reading')
+    args = parse_ingest_args(parser=parser)
+    try:
+        run_ingest(args.dataset or DEFAULT_DATASETS, workers=args.workers, manifest=args.manifest,
+            force=args.force, options=write_options(args), validate=not args.no_validate)
+    except CatalogError as error:
+        sys.exit(f"{error}\nNothing was converted.")
+    # Refresh the app's scenario catalog now rather than on its first load
+    print(f"{len(scenario_catalog('data'))} scenarios in the data catalog")
@@ -0,0 +1,229 @@
+import pyarrow as pa
+import datetime
+
+
+# Declarative description of every DSS -> feather conversion; ingest.py
+# turns it into outputs and read passes. Each dataset names its kind (the
+# output layout below), its source DSS file per pattern year, the arc
+# spillway configurations to convert (mapped to the letter the alternative
+# names use), the scale factors per pattern year to convert and how its
+# alternative names are spelled. Alternative templates are formatted with
+# alt (the EST alternative number), cfg (the configuration letter), pct,
+# and the dataset's per-year letter and trial.
+
+
+windowLookupPST = {
+    '1997': [
+        datetime.datetime.strptime('18 Dec 1996 0400', '%d %b %Y %H%M'),
+        datetime.datetime.strptime('09 Jan 1997 0400', '%d %b %Y %H%M')
+    ],
+    '1986': [
+        datetime.datetime.strptime('04 Feb 1986 0400', '%d %b %Y %H%M'),
+        datetime.datetime.strptime('26 Feb 1986 0400', '%d %b %Y %H%M')
+    ],
+}
+
+# The baseline DSS times are UTC and are shifted to PST on read
+windowLookupUTC = {
+    '1997': [
+        datetime.datetime.strptime('18 Dec 1996 1200', '%d %b %Y %H%M'),
+        datetime.datetime.strptime('09 Jan 1997 1200', '%d %b %Y %H%M')
+    ],
+    '1986': [
+        datetime.datetime.strptime('04 Feb 1986 1200', '%d %b %Y %H%M'),
+        datetime.datetime.strptime('26 Feb 1986 1200', '%d %b %Y %H%M')
+    ],
+}
+
+# Pathname templates per reservoir and variable, formatted with scale and
+# alternative
+estPathTemplates = {
+    "ORO": {
+        "POOL-ELEV": "//OROVILLE-POOL/ELEV//1HOUR/C:000{scale:03d}|{alternative}/",
+        "FIRO-TARGET": "//OROVILLE-FIRO TARGET/ELEV-ZONE//1HOUR/C:000{scale:03d}|{alternative}/",
+        "ORO-OUT": "//OROVILLE-POOL/FLOW-OUT//1HOUR/C:000{scale:03d}|{alternative}/",
+        "ORO-IN": "//OROVILLE-POOL/FLOW-IN//1HOUR/C:000{scale:03d}|{alternative}/",
+        "CONFLUENCE": "//FEATHER R + YUBA R/FLOW//1HOUR/C:000{scale:03d}|{alternative}/",
+        "NICOLAUS": "//NICOLAUS/FLOW//1HOUR/C:000{scale:03d}|{alternative}/",
+        "MARYSVILLE": "//MARYSVILLE/FLOW//1HOUR/C:000{scale:03d}|{alternative}/",
+        "YUBA CITY": "//YUBA CITY/FLOW//1HOUR/C:000{scale:03d}|{alternative}/",
+        "DURATION": "//ORO_CONTROLLING_DURATION/DURCODE//1HOUR/C:000{scale:03d}|{alternative}/",
+    },
+    "NBB": {
+        "POOL-ELEV": "//NEW BULLARDS BAR-POOL/ELEV//1HOUR/C:000{scale:03d}|{alternative}/",
+        "FIRO-TARGET": "//NEW BULLARDS BAR-FIRO TARGET/ELEV-ZONE//1HOUR/C:000{scale:03d}|{alternative}/",
+        "NBB-OUT": "//NEW BULLARDS BAR-POOL/FLOW-OUT//1HOUR/C:000{scale:03d}|{alternative}/",
+        "NBB-IN": "//NEW BULLARDS BAR-POOL/FLOW-IN//1HOUR/C:000{scale:03d}|{alternative}/",
+        "CONFLUENCE": "//FEATHER R + YUBA R/FLOW//1HOUR/C:000{scale:03d}|{alternative}/",
+        "NICOLAUS": "//NICOLAUS/FLOW//1HOUR/C:000{scale:03d}|{alternative}/",
+        "MARYSVILLE": "//MARYSVILLE/FLOW//1HOUR/C:000{scale:03d}|{alternative}/",
+        "YUBA CITY": "//YUBA CITY/FLOW//1HOUR/C:000{scale:03d}|{alternative}/",
+        "DURATION": "//NBB_CONTROLLING_DURATION/DURCODE//1HOUR/C:000{scale:03d}|{alternative}/",
+    },
+}
+
+baselinePathTemplates = {
+    "ORO": {
+        "POOL-ELEV": "//OROVILLE-POOL/ELEV//1Hour/C:000{scale:03d}|{alternative}/",
+        "ORO-OUT": "//OROVILLE-POOL/FLOW-OUT//1Hour/C:000{scale:03d}|{alternative}/",
+    },
+    "NBB": {
+        "POOL-ELEV": "//NEW BULLARDS BAR-POOL/ELEV//1Hour/C:000{scale:03d}|{alternative}/",
+        "NBB-OUT": "//NEW BULLARDS BAR-POOL/FLOW-OUT//1Hour/C:000{scale:03d}|{alternative}/",
+    },
+}
+
+# Output layouts. blocks lists the label loops outermost first, and each
+# block of an output is one combination of them: the reservoir label loops
+# over reservoirs, pct over the dataset's pcts and alternative over its
+# alternatives. A block is read from the reservoir's pathname templates
+# and written with those label values.
+KINDS = {
+    'est': {
+        'output': r"data\{year}_{scale}_{config}_{dataset}_Alt3.feather",
+        'labelFields': {'Reservoir': pa.string(), 'pct': pa.int64()},
+        'blocks': ['pct', 'Reservoir'],
+        'reservoir': 'Reservoir',
+        'paths': estPathTemplates,
+        'window': windowLookupPST,
+        'convertTime': False,
+        'durations': True,
+    },
+    'baseline': {
+        'output': r"data\{year}_{scale}_{config}_baseline.feather",
+        'labelFields': {'alternative': pa.string(), 'reservoirName': pa.string()},
+        'blocks': ['reservoirName', 'alternative'],
+        'reservoir': 'reservoirName',
+        'paths': baselinePathTemplates,
+        'window': windowLookupUTC,
+        'convertTime': True,
+        'durations': False,
+    },
+}
+
+reservoirs = ["ORO", "NBB"]
+pct_options = list(range(5, 100, 5))
+estAlternative = 3
+
+DATASETS = {
+    "FVA_config": {
+        'kind': 'est',
+        'sources': {
+            1997: r"data\FVA_config\SS-1997_results_v7.dss",
+            1986: r"data\FVA_config\SS-1986_results_v7.dss",
+        },
+        'configs': {"With": "S", "Without": "P"},
+        'scales': {
+            1986: [116, 118, 120, 130, 140, 150],
+            1997: [84, 86, 88, 90, 92, 94, 96, 98, 100, 102, 104, 106, 108, 110, 120, 130],
+        },
+        'pcts': pct_options,
+        'alternative': "SS_FV0{alt}{cfg}-P{pct:02d}",
+    },
+    "HDR_proposals": {
+        'kind': 'est',
+        'sources': {
+            1997: r"data\HDR_proposals\SS-1997_results_v7.dss",
+            1986: r"data\HDR_proposals\SS-1986_results_v7.dss",
+        },
+        'configs': {"With": "S", "Without": "P"},
+        'scales': {
+            1986: [100, 102, 104, 106, 108, 110, 112, 114, 116, 118, 120, 130, 140, 150],
+            1997: [84, 86, 88, 90, 92, 94, 96, 98, 100, 102, 104, 106, 108, 110, 120, 130],
+        },
+        'pcts': pct_options,
+        'alternative': "SS_FV0{alt}{cfg}-P{pct:02d}",
+    },
+    "ORO_Release_v2": {
+        'kind': 'est',
+        'sources': {
+            1997: r"data\ORO_Release_v2\1997_simulation_v7.dss",
+            1986: r"data\ORO_Release_v2\1986_simulation_v7.dss",
+        },
+        'configs': {"With": "S"},
+        'scales': {
+            1986: [100, 102, 104, 106, 108, 110, 112, 114, 116, 118, 120],
+        },
+        'pcts': [75],
+        'alternative': "SS_FV0{alt}{cfg}--1",
+    },
+    "ORO_Release_TargetVols": {
+        'kind': 'est',
+        'sources': {
+            1997: r"data\ORO_Release_TargetVols\1997_simulation_targetVols_v7.dss",
+            1986: r"data\ORO_Release_TargetVols\1986_simulation_targetVols_v7.dss",
+        },
+        'configs': {"With": "S"},
+        'scales': {
+            1986: [100, 102, 104, 106, 108, 110, 112, 114, 116, 118, 120, 130],
+            1997: [84, 86, 88, 90, 92, 94, 96, 98, 100, 102, 104, 106, 108, 110, 120],
+        },
+        'pcts': [75],
+        'trials': {1986: 4, 1997: 1},
+        'alternative': "SS_FV0{alt}{cfg}--{trial}",
+    },
+    "NBB_Release": {
+        'kind': 'est',
+        'sources': {
+            1997: r"data\NBB_Release\1997_simulation_v7.dss",
+        },
+        'configs': {"With": "A"},
+        'scales': {
+            1997: [84, 86, 88, 90, 92, 94, 96, 98, 100, 102, 104, 106, 108, 110, 120],
+        },
+        'pcts': [75],
+        'letters': {1986: 'C', 1997: 'D'},
+        'trials': {1997: 0},
+        'alternative': "RI{letter}_F0{alt}{cfg}_-{trial}",
+    },
+    "NBB_Release_Increasing_Target": {
+        'kind': 'est',
+        'sources': {
+            1997: r"data\NBB_Release_Increasing_Target\1997_simulation_v7.dss",
+        },
+        'configs': {"With": "A"},
+        'scales': {
+            1997: [84, 86, 88, 90, 92, 94, 96, 98, 100, 102, 104, 106, 108, 110, 120, 130],
+        },
+        'pcts': [75],
+        'letters': {1986: 'C', 1997: 'D'},
+        'trials': {1997: 0},
+        'alternative': "RI{letter}_F0{alt}{cfg}_-{trial}",
+    },
+    "NBB_Release_1986_Edits": {
+        'kind': 'est',
+        'sources': {
+            1986: r"data\NBB_Release_1986_Edits\1986_simulation_v7.dss",
+            1997: r"data\NBB_Release_1986_Edits\1997_simulation_v7.dss",
+        },
+        'configs': {"With": "A"},
+        'scales': {
+            1986: [100, 102, 104, 106, 108, 110, 112, 114, 116, 118, 120, 130],
+            1997: [84, 86, 88, 90, 92, 94, 96, 98, 100, 102, 104, 106, 108, 110, 120, 130],
+        },
+        'pcts': [75],
+        'letters': {1986: 'C', 1997: 'D'},
+        'trials': {1986: 0, 1997: 0},
+        'alternative': "RI{letter}_F0{alt}{cfg}_-{trial}",
+    },
+    "baseline": {
+        'kind': 'baseline',
+        'sources': {
+            1986: "20240708_simulation_combined_HEFS.dss",
+            1997: "20240708_simulation_combined_HEFS.dss",
+        },
+        'configs': {"With": "A", "Without": "E"},
+        'scales': {
+            1986: [100, 102, 104, 106, 108, 110, 112, 114, 116, 118, 120, 130, 140, 150],
+            1997: [84, 86, 88, 90, 92, 94, 96, 98, 100, 102, 104, 106, 108, 110, 120, 130],
+        },
+        'alternatives': {
+            "ID0": "SS_FV00{cfg}--0",
+            "ID1": "SS_FV01{cfg}--0",
+            "ID3-PERFECT": "SS_FV03{cfg}--0",
+        },
+    },
+}
+
+# Converted when ingest.py is run without --dataset
+DEFAULT_DATASETS = ["FVA_config", "ORO_Release_v2", "ORO_Release_TargetVols", "NBB_Release_1986_Edits", "baseline"]
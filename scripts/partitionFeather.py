@@ -0,0 +1,68 @@
+from dssIngest import check_float32, feather_compression, output_schema, partition_path
+from scenarioData import PARTITION_KEYS, duration_path, scenario_name, summary_path
+import pyarrow as pa
+import pyarrow.feather
+import argparse
+import glob
+import os
+import shutil
+
+
+# Rewrites the per-scenario feather files in data/ into the hive-partitioned
+# layout the converters write with --partitioned, without going back to DSS,
+# along with their duration and summary companion tables
+
+estLabelFields = {'Reservoir': pa.string(), 'pct': pa.int64()}
+baselineLabelFields = {'alternative': pa.string(), 'reservoirName': pa.string()}
+
+
+def scenario_partition(fileName):
+    # (partition, labelFields) for a data/ file name, or None if it is not a
+    # long-layout feather scenario file
+    fields = scenario_name(fileName)
+    if fields is None or (fields['layout'], fields['format']) != ('long', 'feather'):
+        return None
+    partition = {key: fields[key] for key in PARTITION_KEYS}
+    return partition, baselineLabelFields if partition['dataset'] == 'baseline' else estLabelFields
+
+
+def partition_file(path, root, compact=False, float32=False, compression='lz4', compression_level=None):
+    partition, labelFields = scenario_partition(os.path.basename(path))
+    schema = output_schema(labelFields, compact, float32)
+
+    table = pyarrow.feather.read_table(path).select(schema.names)
+    if float32:
+        table = table.set_column(2, 'value', pa.array(check_float32(table['value'].to_numpy())))
+    table = table.cast(schema)
+
+    output = partition_path(root, partition)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    pyarrow.feather.write_feather(table, output, **feather_compression(compression, compression_level))
+
+    # The duration and summary companions go along, so readers of the
+    # partition find them as they find the flat file's
+    for companion in [duration_path, summary_path]:
+        if os.path.exists(companion(path)):
+            shutil.copyfile(companion(path), companion(output))
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Rewrite data/ feather files as one hive-partitioned dataset')
+    parser.add_argument('--data', default='data')
+    parser.add_argument('--root', default=os.path.join('data', 'scenarios'))
+    parser.add_argument('--compact', action='store_true')
+    parser.add_argument('--float32', action='store_true',
+        help='store values as float32, a lossy cast to ~7 significant digits; values outside the float32 range '
+             'are rejected')
+    parser.add_argument('--compression', choices=['none', 'lz4', 'zstd'], default='lz4')
+    parser.add_argument('--compression-level', type=int, default=None)
+    args = parser.parse_args()
+
+    files = [
+        path for path in sorted(glob.glob(os.path.join(args.data, '*.feather')))
+        if scenario_partition(os.path.basename(path)) is not None
+    ]
+    for path in files:
+        partition_file(path, args.root, args.compact, args.float32, args.compression, args.compression_level)
+    print(f"{len(files)} files written under {args.root}")
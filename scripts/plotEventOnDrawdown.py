@@ -64,11 +64,11 @@ def getDssData(fid, path, variable, window, convertTime=False):
 
     ts = fid.get(path, startdatetime=window[0], enddatetime=window[1])
     values = ts.values
-    times = ts.times
+    times = pd.DatetimeIndex(ts.times)
 
     if convertTime:
-        times = [i - datetime.timedelta(hours=8) for i in times]  # Convert to PST
-    df = pd.DataFrame(index = pd.DatetimeIndex(times), data = {variable: values})
+        times = times - pd.Timedelta(hours=8)  # Convert to PST
+    df = pd.DataFrame(index = times, data = {variable: values})
     
     return df
 
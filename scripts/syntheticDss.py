@@ -0,0 +1,206 @@
+import numpy as np
+import os
+import re
+import zlib
+
+
+# Offline stand-in for a hecdss.HecDss handle (see dssIngest.DSS_READERS).
+# Each pathname the converters request gets a deterministic, roughly
+# realistic hourly series: a storm hydrograph on the pool inflows, routed
+# and capped outflows, gauge flows, pool elevations that follow the
+# storage, FIRO target drawdowns and controlling-duration codes. Peaks
+# scale with the pathname's C:000<scale> scale factor.
+#
+# A file's series can be written once to <dss_file>.npz (write_archive);
+# SyntheticDss then serves them from the archive instead of generating
+# them, so benchmarks time the ingest rather than the generator.
+
+HOUR = np.timedelta64(1, 'h')
+
+# B part -> (base flow, peak inflow at scale 100, outflow cap) in cfs and
+# (starting elevation, pre-storm drawdown, storm rise at scale 100) in ft
+reservoirLookup = {
+    'OROVILLE-POOL': {'flow': (8000, 320000, 150000), 'elev': (859.5, 8, 36)},
+    'NEW BULLARDS BAR-POOL': {'flow': (2000, 120000, 50000), 'elev': (1929.5, 24, 30)},
+}
+
+# Gamma shape of the storm hydrographs: about a three-day flood peak
+STORM_SHAPE = 30.0
+
+# B part -> (base flow, peak flow at scale 100) in cfs
+gaugeLookup = {
+    'FEATHER R + YUBA R': (12000, 300000),
+    'NICOLAUS': (12000, 335000),
+    'MARYSVILLE': (250, 170000),
+    'YUBA CITY': (12000, 160000),
+}
+
+# FIRO target B part -> (top of conservation, pre-storm drawdown) in ft
+targetLookup = {
+    'OROVILLE-FIRO TARGET': (859.5, 20),
+    'NEW BULLARDS BAR-FIRO TARGET': (1929.5, 34),
+}
+
+# Controlling-duration codes as they appear in the real DURCODE records
+durationCodes = [7, 50, 300, 350, 2000, 2357, 10000, 12000]
+
+
+def archive_path(dss_file):
+    return dss_file + '.npz'
+
+
+def _parts(path):
+    # ['', A, B, C, D, E, F, ''] -> (B, C, F)
+    parts = path.upper().split('/')
+    return parts[2], parts[3], parts[6]
+
+
+def _seed(*keys):
+    return zlib.crc32('|'.join(keys).encode())
+
+
+def _scale(fPart):
+    match = re.match(r'C:0*(\d+)', fPart)
+    return int(match.group(1)) / 100 if match else 1.0
+
+
+def _hydrograph(n, base, peak, peakAt, shape=STORM_SHAPE):
+    # Gamma-shaped storm hydrograph rising to peak at hour peakAt
+    x = np.arange(n) / max(peakAt, 1)
+    return base + (peak - base) * x ** shape * np.exp(shape * (1 - x))
+
+
+def _storm(dss_file, site, fPart, n):
+    # Inflow, outflow and hour of peak inflow of one reservoir for one
+    # alternative; shared by the site's FLOW-IN, FLOW-OUT and ELEV records
+    # so they stay consistent
+    rng = np.random.default_rng(_seed(dss_file, site, fPart))
+    base, peak, cap = reservoirLookup[site]['flow']
+    scale = _scale(fPart)
+    peakAt = int(n * rng.uniform(0.62, 0.68))
+    inflow = _hydrograph(n, base, peak * scale * rng.uniform(0.9, 1.1), peakAt)
+    lag = 12
+    routed = np.concatenate([np.full(lag, inflow[0]), inflow[:-lag]]) * 0.6
+    outflow = np.clip(routed, base * 0.15, cap * max(scale, 1.0))
+    return inflow, outflow, peakAt
+
+
+def synthetic_series(dss_file, path, n):
+    # n hourly values for one pathname
+    site, cPart, fPart = _parts(path)
+    rng = np.random.default_rng(_seed(dss_file, path.upper()))
+    scale = _scale(fPart)
+
+    if site in reservoirLookup:
+        inflow, outflow, peakAt = _storm(dss_file, site, fPart, n)
+        if cPart == 'FLOW-IN':
+            return inflow * rng.normal(1, 0.01, n)
+        if cPart == 'FLOW-OUT':
+            return np.round(outflow, 1)
+        # The pool is drawn down ahead of the storm and crests about a day
+        # after the peak inflow
+        start, drawdown, rise = reservoirLookup[site]['elev']
+        return (start - drawdown * _hydrograph(n, 0, 1, peakAt // 2, shape=3.0)
+                + rise * scale * _hydrograph(n, 0, 1, peakAt + 24, shape=12.0))
+
+    if site in targetLookup:
+        top, drawdown = targetLookup[site]
+        steps = np.floor(_hydrograph(n, 0, 1, int(n * 0.3), shape=2.0) * 8) / 8
+        return top - drawdown * steps
+
+    if site in gaugeLookup:
+        base, peak = gaugeLookup[site]
+        flow = _hydrograph(n, base, peak * scale * rng.uniform(0.9, 1.1), int(n * rng.uniform(0.64, 0.72)))
+        return flow * rng.normal(1, 0.005, n)
+
+    if cPart == 'DURCODE':
+        codes = np.zeros(n)
+        hour = int(n * 0.45)
+        while hour < int(n * 0.75):
+            length = int(rng.integers(6, 48))
+            codes[hour:hour + length] = rng.choice(durationCodes)
+            hour += length + int(rng.integers(0, 24))
+        return codes
+
+    return rng.random(n) * 1000
+
+
+class _Series:
+    def __init__(self, times, values):
+        self.times = times
+        self.values = values
+
+
+class _Catalog:
+    def __init__(self, paths):
+        self.uncondensed_paths = paths
+
+
+class SyntheticDss:
+    # hecdss.HecDss look-alike: get(path, startdatetime=, enddatetime=),
+    # get_catalog() and close()
+
+    def __init__(self, dss_file):
+        self.dss_file = dss_file
+        self._archive = {}
+        if os.path.exists(archive_path(dss_file)):
+            with np.load(archive_path(dss_file)) as archive:
+                offsets = archive['offsets']
+                values = archive['values']
+                starts = archive['start']
+                # A pathname read over several windows has a segment per window
+                for i, path in enumerate(archive['paths']):
+                    self._archive.setdefault(str(path), []).append((starts[i], values[offsets[i]:offsets[i + 1]]))
+
+    def get(self, path, startdatetime=None, enddatetime=None):
+        start = np.datetime64(startdatetime, 'ns')
+        end = np.datetime64(enddatetime, 'ns')
+        segments = self._archive.get(path.upper())
+        if segments is None:
+            n = int((end - start) // HOUR) + 1
+            return _Series(start + np.arange(n) * HOUR, synthetic_series(self.dss_file, path, n))
+
+        archiveStart, values = min(segments, key=lambda segment: abs(segment[0] - start))
+        first = max(int(np.ceil((start - archiveStart) / HOUR)), 0)
+        last = min(int((end - archiveStart) // HOUR), len(values) - 1)
+        hours = np.arange(first, last + 1)
+        return _Series(archiveStart + hours * HOUR, values[first:last + 1])
+
+    def get_catalog(self):
+        # One record per monthly block the archived series span, as hourly
+        # records are stored in DSS; generated files have no catalog
+        paths = {}
+        for path, segments in self._archive.items():
+            parts = path.split('/')
+            for start, values in segments:
+                end = start + (len(values) - 1) * HOUR
+                for month in np.arange(start.astype('datetime64[M]'), end.astype('datetime64[M]') + 1):
+                    parts[4] = month.astype(object).strftime('%d%b%Y').upper()
+                    paths.setdefault('/'.join(parts))
+        return _Catalog(list(paths))
+
+    def close(self):
+        self._archive = {}
+
+
+def write_archive(dss_file, requests):
+    # requests: (pathname, window) pairs, e.g. from ingest.scenario_inputs();
+    # each pathname is generated once per window
+    paths, starts, chunks = [], [], []
+    seen = set()
+    for path, window in requests:
+        key = (path.upper(), tuple(window))
+        if key in seen:
+            continue
+        seen.add(key)
+        start = np.datetime64(window[0], 'ns')
+        n = int((np.datetime64(window[1], 'ns') - start) // HOUR) + 1
+        paths.append(path.upper())
+        starts.append(start)
+        chunks.append(synthetic_series(dss_file, path, n))
+
+    offsets = np.concatenate([[0], np.cumsum([len(chunk) for chunk in chunks])])
+    os.makedirs(os.path.dirname(dss_file) or '.', exist_ok=True)
+    np.savez(archive_path(dss_file), paths=np.array(paths), start=np.array(starts, dtype='datetime64[ns]'),
+             offsets=offsets, values=np.concatenate(chunks) if chunks else np.empty(0))
+    return archive_path(dss_file)